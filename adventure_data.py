@@ -41,6 +41,8 @@ items = {
     
     "fish": {"name": "Herring", "description": "Somewhat crimson in hue"},
 
+    "locker key": {"name": "Locker Key", "description": "Small key with a tag reading 'Lockers'. Slightly sticky."},
+
 
     "pass": {"name": "Security Pass",
              "description": "Security pass bearing name name 'Rowley Birkin'.",
@@ -0,0 +1,796 @@
+""""
+Simple verb-noun text adventure engine
+Relies on items defined in items dictionary and locations
+defined in locations dictionary, imported from adventure_data.py.
+
+The engine is headless - it never prints or reads from the terminal itself.
+Call start() for the opening text, then step() with each line of player
+input. Both return the rendered output for that turn as a string, so one
+process can interleave many sessions. office-adventure.py wraps this in a
+console loop.
+"""
+
+# Improvements to make?
+# More verbs - capability to use items
+# Containers - items can hold other items
+# More complex interactions
+# Possibly have classes for items and/or locations rather than dictionaries
+
+
+import random
+# Import the game data
+from adventure_data import items, locations, item_events
+from command_parser import PrefixIndex, prefix_matches, split_commands
+from containers import ItemList
+from item_rules import ItemEventIndex, ItemEventTracker
+from output_sinks import StdoutSink
+from render_cache import RenderCache
+from room_graph import RoomGraph
+from world_state import BaseThings, WorldState
+
+
+def verb(*names, noun=None):
+    """Decorator marking an Adventure method as the handler for a verb
+    Args:
+        names - verb(s) typed by the player. Several names give synonyms.
+        noun - what the noun is, so abbreviations of it can be expanded:
+               "item" (one the player can see), "direction" or "location"
+    """
+    def mark(fn):
+        fn.verb_names = names
+        fn.verb_noun = noun
+        return fn
+    return mark
+
+
+class Adventure(object):
+    """Text Adventure
+    Relies on data in items and locations dictionaries.
+    Args:
+        start_text - introductory text shown by start()
+        start_location - dictionary key of start location from locations dict
+        world - optional WorldState to play in. By default a new overlay on
+                the shared locations dictionary, so sessions don't interfere.
+        event_index - optional ItemEventIndex of item events to play. By
+                      default the item_events from adventure_data.py.
+        render_cache - optional RenderCache for the world being played
+        room_graph - optional RoomGraph for the world being played
+        compiled_world - optional CompiledWorld (see world_compiler.py) to play
+                         instead of the data in adventure_data.py. Provides
+                         defaults for world, event_index, render_cache and room_graph.
+        sink - optional OutputSink each turn's output is written to, in one write
+        seed - optional seed for the session's random messages. Sessions with
+               the same seed given the same commands play out the same.
+    """
+    # Movement directions supported
+    directions = ["north", "south", "east", "west", "up", "down"]
+    # Initial letters of directions, mapped back to full direction name
+    direction_letters = {d[0]: d for d in directions}
+    # Words that mean "go <direction>" when typed on their own
+    direction_words = frozenset(directions) | frozenset(direction_letters)
+    # For expanding abbreviated directions
+    direction_index = PrefixIndex(directions)
+    # Maps each verb (and synonym) to its handler. Built once per class by build_verbs()
+    verbs = {}
+    # Maps each verb to the kind of noun it takes (see @verb). Built along with verbs.
+    verb_nouns = {}
+    # For expanding abbreviated verbs. Built along with verbs.
+    verb_index = PrefixIndex()
+
+    def __init_subclass__(cls, **kwargs):
+        """Give each subclass its own verb table, including any new verbs it defines"""
+        super().__init_subclass__(**kwargs)
+        cls.build_verbs()
+
+    @classmethod
+    def build_verbs(cls):
+        """(Re)build the class's verb table from methods marked with @verb
+        and handlers added with register_verb()
+        """
+        verbs = {}
+        verb_nouns = {}
+        # Walk from base class down so subclasses can override verbs
+        for klass in reversed(cls.__mro__):
+            for key, attr in vars(klass).items():
+                for name in getattr(attr, "verb_names", ()):
+                    # Looked up on cls, so a subclass overriding the method
+                    # without @verb still has its own method called
+                    verbs[name] = getattr(cls, key)
+                    verb_nouns[name] = attr.verb_noun
+            for name, fn in vars(klass).get("registered_verbs", {}).items():
+                verbs[name] = fn
+                verb_nouns[name] = getattr(fn, "verb_noun", None)
+        cls.verbs = verbs
+        cls.verb_nouns = verb_nouns
+        cls.verb_index = PrefixIndex(verbs)
+
+    @classmethod
+    def register_verb(cls, fn, *names):
+        """Add a verb handler without editing the class, e.g. from a plugin
+        Affects this class and its subclasses, whenever they were created,
+        unless a subclass has its own handler for the verb.
+        Args:
+            fn - function taking (game, noun)
+            names - verb(s) the handler responds to
+        """
+        # Kept on the class itself so a parent class isn't changed
+        if "registered_verbs" not in vars(cls):
+            cls.registered_verbs = {}
+        for name in names:
+            cls.registered_verbs[name] = fn
+        classes = [cls]
+        while classes:
+            klass = classes.pop()
+            klass.build_verbs()
+            classes.extend(klass.__subclasses__())
+
+    def __init__(self, start_text, start_location="Start", world=None, event_index=None,
+                 render_cache=None, room_graph=None, sink=None, compiled_world=None, seed=None):
+        # Game start text info
+        self.start_text = start_text
+        if compiled_world is not None:
+            if world is None:
+                world = compiled_world.new_state()
+            event_index = event_index or compiled_world.event_index
+            render_cache = render_cache or compiled_world.render_cache
+            room_graph = room_graph or compiled_world.room_graph
+            self.items = compiled_world.items
+        else:
+            self.items = items
+        # This session's view of the locations - changes to things are kept per session
+        if world is None:
+            world = WorldState(locations, self.items, default_base_things)
+        self.world = world
+        # Key of player's location
+        self.location_key = start_location
+        # Tracks which item events need re-checking after items move
+        self.event_tracker = ItemEventTracker(event_index or default_event_index)
+        # Wrapped text and location lines, shared with other sessions
+        self.render_cache = render_cache or default_render_cache
+        # Routes between locations, shared with other sessions
+        self.room_graph = room_graph or default_room_graph
+        # "You can see" lines for locations this session has changed
+        # Location key -> (things version, line)
+        self.seen_lines = {}
+        # Holds last input from user as dictionary of words
+        self.current_input = []
+        # Player inventory
+        self.inventory = ItemList()
+        # Tracks number of moves between locations
+        self.move_count = 0
+        # Output lines collected during the current turn
+        self.output = []
+        # Where each turn's output is written (as well as being returned)
+        self.sink = sink
+        # When True, the prompt is written at the end of each turn's output
+        self.prompt_in_output = False
+        # Prompt a front end should show before the next input
+        self.prompt = ">"
+        # Set when "quit" is waiting for its y/n confirmation
+        self.confirming_quit = False
+        self.keep_going = True
+        # Number of step() calls so far - with seed, decides random choices
+        self.turn_count = 0
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random()
+        # Turn self.rng was last seeded for
+        self.rng_turn = None
+        # When False, turns are played without producing any output,
+        # e.g. when catching up on a session's logged commands
+        self.rendering = True
+
+    @property
+    def current_location(self):
+        """Base data for player's location. Use self.world for its things."""
+        return self.world.location(self.location_key)
+
+    @property
+    def location_things(self):
+        """Items present in player's location (read-only)"""
+        return self.world.things(self.location_key)
+
+    def start(self):
+        """Begin the game
+        Returns:
+            intro text and description of the start location
+        """
+        self.show_start_text()
+        self.display_info()
+        return self.flush_output()
+
+    def step(self, command):
+        """Process one line of player input
+        The line can hold several commands, e.g. "take pass, north, look"
+        (separated by commas, semicolons or "then"), which are all played
+        in this turn.
+        Args:
+            command - the text typed by the player
+        Returns:
+            output produced by the turn
+        """
+        for part in self.begin_turn(command):
+            self.play_command(part)
+            self.item_events_check()
+            # Rest of line is dropped once quitting
+            if self.confirming_quit:
+                break
+        return self.end_turn()
+
+    # step() in separate phases, so a host can check item events for many
+    # sessions together (see batch_rules.py)
+    def begin_turn(self, command):
+        """Start a turn
+        Args:
+            command - the text typed by the player
+        Returns:
+            list of commands in it still to be played by play_command()
+        """
+        self.turn_count += 1
+        if self.confirming_quit:
+            self.confirm_quit(command)
+            return []
+        return split_commands(command)
+
+    def play_command(self, command):
+        """Play one command from the turn's line of input (without item event checks)"""
+        self.read_input(command)
+        self.parse()
+
+    def end_turn(self):
+        """Finish a turn
+        Returns:
+            output produced by the turn
+        """
+        # Atmosphere messages appear before the next prompt
+        if self.keep_going:
+            self.extra_stuff()
+        return self.flush_output()
+
+    def run_game(self):
+        """Main game loop - plays the game on the console
+        Each turn's output, including the next prompt, is written in one go.
+        """
+        if self.sink is None:
+            self.sink = StdoutSink()
+        self.prompt_in_output = True
+        self.start()
+        while self.keep_going:
+            self.step(input())
+
+    def flush_output(self):
+        """Return output collected since the last flush and clear it
+        The output is also written to self.sink, if there is one, in a single write.
+        """
+        if not self.rendering:
+            return ""
+        if self.prompt_in_output and self.keep_going:
+            self.output.append(self.prompt)
+        text = "".join(self.output)
+        self.output.clear()
+        if self.sink is not None:
+            self.sink.write(text)
+        return text
+
+    def turn_random(self):
+        """Return random number generator for this turn
+        It's seeded from the session's seed and turn number, so replaying a
+        session's commands gives the same results without having to save the
+        generator's state.
+        """
+        if self.rng_turn != self.turn_count:
+            self.rng.seed((self.seed << 32) + self.turn_count)
+            self.rng_turn = self.turn_count
+        return self.rng
+
+    def extra_stuff(self):
+        """Do some extra stuff - random atmosphere messages"""
+        if self.move_count > 10:
+            option = self.turn_random().randint(1, 20)
+            if option == 1:
+                self.show("The lights flicker ominously but then recover.")
+            elif option == 2:
+                self.show("Did something move in the shadows?")
+            elif option == 3:
+                self.show("What was that noise, 'Iä! Iä! Cthulhu fhtagn'?")
+
+    def show(self, text, line_length=80, add_line=False):
+        """Display output - adds wrapped text to the current turn's output
+        Wrapped text is kept in the render cache, so repeated text is only wrapped once
+        Args:
+            text - text to be displayed
+            line_length (int) - line-length used for text wrapiing
+            add_line (bool) - when True, add blank line between paragraphs
+        """
+        if not self.rendering:
+            return
+        self.output.append(self.render_cache.wrap(text, line_length))
+        if add_line:
+            self.output.append("\n")
+
+    def show_start_text(self):
+        """Display introductory message"""
+        self.show(self.start_text, add_line=True)
+
+    def display_info(self):
+        """Show information about current location"""
+        if not self.rendering:
+            return
+        cl = self.current_location
+        # Show locations name and description
+        self.show("[" + cl.get("name") + "]", add_line=False)
+        self.show(cl.get("description"), add_line=True)
+        # Show items present
+        seen = self.seen_line()
+        if seen:
+            self.show(seen)
+        # Show exits
+        self.show(self.render_cache.exits_line(self.location_key))
+
+    def seen_line(self):
+        """Return "You can see" line for current location ("" if nothing there)
+        Only rebuilt when the location's things have changed.
+        """
+        key = self.location_key
+        version = self.world.version(key)
+        # Location as it started - line shared with other sessions
+        if not version:
+            return self.render_cache.seen_line(key)
+        cached = self.seen_lines.get(key)
+        if cached is None or cached[0] != version:
+            things = self.location_things
+            line = "You can see: " + ", ".join(self.make_item_list(things)) if things else ""
+            cached = self.seen_lines[key] = (version, line)
+        return cached[1]
+
+    def read_input(self, words):
+        """Split a line of player input into words
+        Args:
+            words - the text typed by the player
+        """
+        words = words.strip().lower()
+        self.current_input = words.split()
+        #Pad to always have at least two empty strings
+        self.current_input.extend([""] * (2 - len(self.current_input)))
+
+    def available_exits(self):
+        """Return exits available from current location"""
+        return [e for e in self.directions
+                if e in self.current_location["exits"]]
+    
+    def make_item_list(self, item_list):
+        """Return formatted list of items in form item name (key)
+        from supplied list of item keys
+        Args:
+            item_list - list of item keys to be included
+        """
+        return ["{} ({})".format(self.items[item]["name"], item) for item in item_list]
+
+    def parse(self):
+        """Simple verb-noun parser.
+        Processes contents of self.current_input.
+        Verbs are looked up in the class-level self.verbs table, built once
+        from the methods marked with the @verb decorator.
+        Verbs, directions, location names and the items the player can see
+        can be abbreviated, as long as only one thing matches.
+        """
+        # Call verb with noun as argument from current input
+        ci = self.current_input
+        # verb "go" can be ommited for movement, so add "go" back if we have a
+        # direction, or initial letter of direction, on its own.
+        # If first word is a direction (or initial letter), and second word empty
+        # Move first word to second and add "go" as first work
+        if not ci[1] and ci[0] in self.direction_words:
+            ci[1] = ci[0]
+            ci[0] = "go"
+
+        if ci[0] and ci[0] not in self.verbs:
+            verb = self.expand_verb(ci[0], direction_allowed=not ci[1])
+            if verb is None:
+                return
+            if verb in self.directions:
+                ci[1] = verb
+                verb = "go"
+            ci[0] = verb
+
+        # Call "verb" function and send noun (rest of the words) as argument
+        verb_fn = self.verbs.get(ci[0])
+        if verb_fn:
+            noun = " ".join(ci[1:]).strip()
+            noun = self.expand_noun(ci[0], noun)
+            if noun is not None:
+                verb_fn(self, noun)
+        # Message when verb not recognised
+        else:
+            message = self.turn_random().choice(["Don't undersand what you said.",
+                                  "Eh?",
+                                  "Do what?",
+                                  "Urgle?",
+                                  "Kindly rephrase."])
+            self.show(message)
+
+    # "Verb" methods - each takes the noun from the player's input.
+    # Registered in the verbs table by the @verb decorator, which can list
+    # synonyms (e.g. get, take)
+    @verb("go", noun="direction")
+    def v_go(self, noun):
+        """Try to move to a new location.
+        Ability to move can be affected by optional "obstacle" location setting.
+        Args:
+            noun - either one of the standard directions from self.directions or
+                   initial letter of a direction (e.g. "n" or "north")
+        """
+        # Do nothing if no noun
+        if not noun:
+            self.show("Go where? Direction needed.")
+            return
+        # Convert single letter noun back into full direction name (eg "n" to "north")
+        if len(noun) == 1:
+            noun = self.direction_letters.get(noun, "")
+        if self.move(noun):
+            self.display_info()
+
+    def move(self, direction):
+        """Move one step in direction, if possible
+        Args:
+            direction - full direction name, e.g. "north"
+        Returns:
+            True if the player moved
+        """
+        # Check for event associated with the particular move
+        event = self.current_location.get("events", {}).get(direction, {})
+        # If there's an event, see if event passes/fails
+        if event:
+            result = self.event_check(**event["needs"])
+            # Process outcomes of pass/fail
+            if result == False:
+                self.event_outcomes(**event["fail_outcomes"])
+                # don't move to new location if event didn't pass
+                return False
+            else:
+                self.event_outcomes(**event["pass_outcomes"])
+                
+        
+        # See if there is an available destination in chosen direction
+        destination = self.current_location["exits"].get(direction, "")
+        # If destination available, move to it
+        if destination:
+            # Invalid destination - should not happen if data is right
+            if not self.world.location(destination):
+                self.show("GAME ERROR - location not found: " + destination)
+                return False
+            self.location_key = destination
+            # Increment move count
+            self.move_count += 1
+            return True
+        else:
+            self.show("Can't go {}.".format(direction))
+            return False
+
+    @verb("travel", noun="location")
+    def v_travel(self, noun):
+        """Travel to a named location along the shortest route, one move at a time.
+        Stops early if a move is blocked (e.g. by the security gates).
+        Args:
+            noun - name (or key) of destination location, e.g. "coffee shop"
+        """
+        if not noun:
+            self.show("Travel where? Location name needed.")
+            return
+        destination = self.room_graph.find(noun)
+        if destination is None:
+            # Abbreviated name - parse() has already checked there's only one match
+            matches = self.room_graph.matches(noun)
+            if matches:
+                destination = matches[0]
+        if destination is None:
+            self.show("Don't know anywhere called {}.".format(noun))
+            return
+        route = self.room_graph.route(self.location_key, destination)
+        if route is None:
+            self.show("Can't find a way to {}.".format(noun))
+            return
+        if not route:
+            self.show("You're already there.")
+            return
+        for direction in route:
+            here = self.location_key
+            if not self.move(direction):
+                break
+            # Stop if an event took the player somewhere off the route
+            if self.location_key != self.world.location(here)["exits"][direction]:
+                break
+        self.display_info()
+
+    @verb("drop", noun="item")
+    def v_drop(self, noun):
+        """Drop item (or all items) from inventory to present location"""
+        # Drop "all"
+        if noun == "all":
+            if self.inventory:
+                for item in self.inventory:
+                    self.show("You drop the " + item)
+                self.event_tracker.touch(*self.inventory)
+                # handy - extend method can be used to combine elements of two lists
+                # (unlike append which puts list inside list)
+                self.world.mutable_things(self.location_key).extend(self.inventory)
+                self.inventory.clear()
+            else:
+                self.show("You don't have anything to drop.")
+        # Drop individual item
+        else:
+            if noun in self.inventory:
+                self.world.mutable_things(self.location_key).append(noun)
+                self.inventory.remove(noun)
+                self.event_tracker.touch(noun)
+                self.show("You drop the {}.".format(noun))
+            else:
+                self.show("No {} to drop.".format(noun))
+                
+    @verb("take", "get", noun="item")
+    def v_take(self, noun):
+        """Take item (or all items) from location and place in inventory"""
+        # Idenfify items present in the current location
+        available_things = self.location_things
+        # Set the things we're going to try to pick up
+        if noun == "all":
+            choices = list(available_things)
+        else:
+            choices = [noun]
+        # Display message if nothing to pick up.
+        if not choices:
+            self.show("There's nothing to pick up.")
+        # Try to pick up each item
+        for choice in choices:
+            if choice in available_things:
+                # Can't pick up item with "fixed" status
+                if "fixed" in  self.items[choice].get("statuses", []):
+                    self.show("You are unable to lift the {}.".format(choice))
+                else:
+                    self.inventory.append(choice)
+                    available_things = self.world.mutable_things(self.location_key)
+                    available_things.remove(choice)
+                    self.event_tracker.touch(choice)
+                    self.show("You pick up the {}.".format(choice))
+            # Can't pick up because choice not present
+            else:
+                self.show("No {} to pick up.".format(choice))
+
+    @verb("examine", noun="item")
+    def v_examine(self, item):
+        """Display item's description, if item available.
+        Also lists what's inside it, if it is a container."""
+        if item in self.inventory or item in self.location_things:
+            self.show(self.items[item]["description"])
+            contents = self.world.contents(item)
+            if contents:
+                self.show("It contains: " + ", ".join(self.make_item_list(contents)))
+        else:
+          self.show("Can't see {} to examine.".format(item))  
+
+    @verb("open", noun="item")
+    def v_open(self, item):
+        """Open container item, if available, tipping its contents out into the current location"""
+        if item not in self.inventory and item not in self.location_things:
+            self.show("Can't see {} to open.".format(item))
+            return
+        contents = self.world.contents(item)
+        if not contents:
+            self.show("There's nothing inside the {}.".format(item))
+            return
+        found = list(contents)
+        self.world.mutable_contents(item).clear()
+        self.world.mutable_things(self.location_key).extend(found)
+        self.event_tracker.touch(*found)
+        self.show("You open the {}. Out falls: {}".format(item, ", ".join(self.make_item_list(found))))
+
+    @verb("exits")
+    def v_exits(self, _):
+        """Display available exists from current location"""
+        self.show("Available exits: " + ", ".join(self.available_exits()))
+
+    @verb("help")
+    def v_help(self, _):
+        """Display some help text"""
+        self.show("Game uses simple verb-noun text adventure input.")
+        self.show("Some areas can only be accessed if you possess a particular item.")
+        self.show("Known verbs: " + ", ".join(self.verbs))
+        self.show("Known directions: "
+                  + ", ".join(self.directions)
+                  + ", (or their initial letters)")
+
+    @verb("inv", "inventory")
+    def v_inv(self, _):
+        """Display contents of inventory."""
+        if self.inventory:
+            things = self.make_item_list(self.inventory)
+            self.show("You have: " + ", ".join(things))
+        else:
+            self.show("You have nothing.")
+
+    @verb("look")
+    def v_look(self, _):
+        """(re) Display description of current location"""
+        self.display_info()
+    
+    @verb("quit")
+    def v_quit(self, _):
+        """quit from game - answer handled by confirm_quit on next step"""
+        self.confirming_quit = True
+        self.prompt = "Are you sure (y/n)? "
+
+    def expand_verb(self, word, direction_allowed=False):
+        """Return verb (or direction) word abbreviates, if only one matches.
+        Args:
+            word - possibly abbreviated verb
+            direction_allowed (bool) - also consider directions, when the word is
+                                       on its own, e.g. "nor" for "north"
+        Returns:
+            the full word. The word unchanged if nothing matches, or None if
+            it's ambiguous (after saying so).
+        """
+        class_verbs = type(self).verbs
+        matches = self.verb_index.matches(word)
+        # Synonyms of one verb aren't ambiguous (e.g. "in" for inv/inventory)
+        if len({class_verbs[match] for match in matches}) == 1:
+            matches = matches[:1]
+        if direction_allowed:
+            matches += self.direction_index.matches(word)
+        if len(matches) > 1:
+            self.show("Did you mean: {}?".format(", ".join(matches)))
+            return None
+        return matches[0] if matches else word
+
+    def expand_noun(self, verb, noun):
+        """Return noun abbreviation expanded, according to the kind of noun the verb takes
+        Args:
+            verb - full verb
+            noun - possibly abbreviated noun
+        Returns:
+            the full noun. The noun unchanged if nothing matches, or None if
+            it's ambiguous (after saying so).
+        """
+        kind = self.verb_nouns.get(verb)
+        if not noun or kind is None or noun == "all":
+            return noun
+        if kind == "item":
+            # Full item keys are the usual case - don't scan for them
+            if noun in self.location_things or noun in self.inventory:
+                return noun
+            matches = prefix_matches(noun, self.location_things)
+            for item in prefix_matches(noun, self.inventory):
+                if item not in matches:
+                    matches.append(item)
+        elif kind == "direction":
+            if noun in self.direction_words:
+                return noun
+            matches = self.direction_index.matches(noun)
+        elif kind == "location":
+            keys = self.room_graph.matches(noun)
+            if len(keys) > 1:
+                names = [self.world.location(key)["name"] for key in keys[:10]]
+                self.show("Did you mean: {}?".format(", ".join(names)))
+                return None
+            return noun
+        else:
+            return noun
+        if len(matches) > 1:
+            self.show("Did you mean: {}?".format(", ".join(matches)))
+            return None
+        return matches[0] if matches else noun
+
+    def confirm_quit(self, answer):
+        """Handle reply to the quit confirmation prompt
+        Args:
+            answer - the text typed by the player
+        """
+        self.confirming_quit = False
+        self.prompt = ">"
+        if answer.strip().lower()[:1] == "y":
+            self.keep_going = False
+            # End message
+            self.show("Bye!")
+
+    # Methods dealing with events that depend on presence/absence of items
+    # in current location or player inventory.
+    def item_events_check(self):
+        """Check each item event
+        Events based on items present in current location.
+        Only events mentioning items that have moved (or are in only one of
+        the previous and current locations) are re-evaluated - see item_rules.py
+        """
+        self.event_tracker.check(self)
+
+    def item_events_full_check(self):
+        """Check each item event by evaluating every one in turn
+        Gives the same results as item_events_check, but more slowly.
+        """
+        for event in self.event_tracker.index.events:
+            result = self.event_check(**event.get("needs", {}))
+            if result:
+                self.event_outcomes(**event.get("pass_outcome", {}))
+            else:
+                self.event_outcomes(**event.get("fail_outcome", {}))
+                
+
+    def event_check(self, player_needs=(), location_needs=(), location_not_needs=(), **kwargs):
+        """Check prerequisites for an action
+        Can be any combination of player needs, location needs or location not needs.
+        Args:
+            player_needs - list of item(s) the player needs in inventory for "pass" result
+            location_needs - list of items needed in location for "pass" result
+            location_not_needs - list of items absent from location for "pass" result
+        Returns:
+            Pass/Fail - fails if any condition fails
+
+        """
+        outcomes = []
+        
+        if player_needs:
+            temp = self.items_present_check(items=player_needs, in_inventory=True)
+            outcomes.append(temp)
+        if location_needs:
+            temp = self.items_present_check(items=location_needs, in_inventory=False)
+            outcomes.append(temp)
+        if location_not_needs:
+            temp = self.items_present_check(items=location_not_needs,
+                                            in_inventory=False,
+                                            invert=True)
+            outcomes.append(temp)
+        
+        return False not in outcomes 
+        
+
+    def event_outcomes(self, message="", new_location="", remove_location_items=(), **kwargs):
+        """Process event outcome
+        Will likely expand to cover add/remove item(s) from location/player
+        """
+        if message:
+            self.show(message)
+        if new_location:
+            self.location_key = new_location
+        #Remove items from current location
+        for item in remove_location_items:
+            if item in self.location_things:
+                self.world.mutable_things(self.location_key).remove(item)
+                self.event_tracker.touch(item)
+            
+
+    def items_present_check(self, items, in_inventory=False, invert=False):
+        """Check if the listed items are all present in either: (a) the current location
+        or (b) player's inventory. Alternatively, do the reverse, i.e. check not present
+        when invert flag set.
+        Args:
+            items - items to check (in list or similar container)
+            in_inventory (bool) - when True check inventory, otherwise check
+                                 current location
+            invert - reverse the response (effecitively reverse the check to "not present")
+        Returns:
+                True/False
+        """
+        status = False
+
+        if in_inventory:
+            compare_items = self.inventory
+        else:
+            compare_items = self.location_things
+        
+        # Inventory and changed locations are ItemLists, so each check is O(1)
+        status = all(item in compare_items for item in items)
+        
+        #Invert the result if flag set
+        if invert:
+            satus = not status
+        return status
+
+
+Adventure.build_verbs()
+
+
+# Index of the standard item events, shared by all sessions
+default_event_index = ItemEventIndex(item_events)
+# Rendered text for the standard world, shared by all sessions
+default_render_cache = RenderCache(locations, items)
+# Routes between locations of the standard world, shared by all sessions
+default_room_graph = RoomGraph(locations)
+# Indexed starting things of the standard world, shared by all sessions
+default_base_things = BaseThings(locations, items)
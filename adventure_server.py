@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+""""
+Multi-session network front end for Office Adventure.
+Serves the game over plain TCP with a telnet-style line protocol - each line
+sent by a client is one command. All sessions share one asyncio event loop.
+
+Usage: python adventure_server.py [--host HOST] [--port PORT] [--idle-timeout SECONDS] [--stats]
+                                  [--telemetry FILE] [--turn-rate TURNS] [--queue LINES]
+                                  [--queue-full block|drop]
+Then connect with e.g. telnet localhost 4000
+With --stats, turn timings are collected and written to stderr on SIGUSR1.
+With --telemetry, a JSON record of every turn is written to FILE.
+With --turn-rate, input is played by a TurnScheduler (see turn_scheduler.py)
+so one client sending lots of commands can't hold up everyone else. Its
+queue depths and waits are written to stderr on SIGUSR2.
+"""
+
+import argparse
+import asyncio
+import signal
+import sys
+
+from adventure_data import intro_text
+from adventure_engine import Adventure
+from instrumentation import Instrumentation
+from telemetry import TelemetryWriter, TurnTelemetry
+from turn_scheduler import TurnScheduler
+
+# Sent when input is dropped because the client's queue is full
+DROPPED_INPUT = "Too many commands at once - ignored: {}\n"
+
+
+class AdventureServer(object):
+    """Serves one Adventure session per TCP connection
+    Args:
+        host - address to listen on
+        port (int) - port to listen on (0 picks a free port)
+        idle_timeout (float) - seconds without input before a client is disconnected
+        start_text - introductory text for each new session
+        stats - optional Instrumentation attached to every session
+        telemetry - optional TurnTelemetry attached to every session
+        scheduler - optional TurnScheduler to play input fairly between
+                    sessions, instead of as soon as it's read
+    """
+    def __init__(self, host="127.0.0.1", port=4000, idle_timeout=300, start_text=intro_text,
+                 stats=None, telemetry=None, scheduler=None):
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.start_text = start_text
+        self.stats = stats
+        self.telemetry = telemetry
+        self.scheduler = scheduler
+        self.scheduling = None
+        self.server = None
+        # Writers of connected clients, so they can be told about shutdown
+        self.clients = set()
+        # Number of sessions started since the server began
+        self.session_count = 0
+
+    async def start(self):
+        """Start listening. Sets self.port to the actual port in use."""
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        if self.scheduler is not None:
+            self.scheduling = asyncio.ensure_future(self.scheduler.run())
+
+    async def serve_forever(self):
+        """Start (if needed) and serve until stop() is called"""
+        if self.server is None:
+            await self.start()
+        try:
+            await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    async def stop(self, message="Server shutting down. Bye!"):
+        """Shut down gracefully - stop accepting, tell clients and disconnect them
+        Args:
+            message - sent to every connected client before disconnecting
+        """
+        self.server.close()
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            await self.scheduling
+        for writer in list(self.clients):
+            writer.write(to_wire(message + "\n"))
+            writer.close()
+        for writer in list(self.clients):
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+        await self.server.wait_closed()
+
+    def new_session(self, session_id):
+        """Return a new game session for a client"""
+        game = Adventure(start_text=self.start_text)
+        if self.stats is not None:
+            self.stats.attach(game)
+        if self.telemetry is not None:
+            self.telemetry.attach(game, session_id)
+        return game
+
+    async def handle_client(self, reader, writer):
+        """Play one session with a connected client"""
+        self.clients.add(writer)
+        self.session_count += 1
+        # Taken before any await - other clients connecting meanwhile change session_count
+        session_id = self.session_count
+        game = self.new_session(session_id)
+        try:
+            writer.write(to_wire(game.start() + game.prompt))
+            await writer.drain()
+            if self.scheduler is not None:
+                await self.play_scheduled(session_id, game, reader, writer)
+                return
+            while game.keep_going:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    writer.write(to_wire("\nIdle for too long. Bye!\n"))
+                    break
+                # Empty read means client disconnected
+                if not line:
+                    break
+                output = game.step(line.decode("utf-8", "replace"))
+                if game.keep_going:
+                    output += game.prompt
+                writer.write(to_wire(output))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            if not writer.is_closing():
+                writer.close()
+
+    async def play_scheduled(self, session_id, game, reader, writer):
+        """Read a client's input into the scheduler, which sends back the output"""
+
+        def deliver(output):
+            if game.keep_going:
+                output += game.prompt
+            writer.write(to_wire(output))
+            # Closing ends the wait for more input below
+            if not game.keep_going:
+                writer.close()
+
+        self.scheduler.register(session_id, game, deliver)
+        try:
+            while game.keep_going:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    writer.write(to_wire("\nIdle for too long. Bye!\n"))
+                    break
+                if not line:
+                    break
+                line = line.decode("utf-8", "replace")
+                if not await self.scheduler.submit(session_id, line) and game.keep_going:
+                    writer.write(to_wire(DROPPED_INPUT.format(line.strip())))
+                await writer.drain()
+        finally:
+            self.scheduler.unregister(session_id)
+
+
+def to_wire(text):
+    """Encode text for sending, with telnet-style line endings"""
+    return text.replace("\n", "\r\n").encode("utf-8")
+
+
+async def main(host, port, idle_timeout, stats, telemetry, scheduler):
+    """Run a server until interrupted"""
+    server = AdventureServer(host, port, idle_timeout, stats=stats, telemetry=telemetry,
+                             scheduler=scheduler)
+    await server.start()
+    print("Office Adventure listening on {}:{}".format(server.host, server.port))
+    serving = asyncio.ensure_future(server.serve_forever())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, serving.cancel)
+    if scheduler is not None:
+        loop.add_signal_handler(signal.SIGUSR2, lambda: sys.stderr.write(scheduler.report()))
+    await serving
+    await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Office Adventure over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--idle-timeout", type=float, default=300,
+                        help="seconds of inactivity before a client is disconnected")
+    parser.add_argument("--stats", action="store_true",
+                        help="record turn timings, written to stderr on SIGUSR1")
+    parser.add_argument("--telemetry", metavar="FILE",
+                        help="write a JSON record of every turn to this file")
+    parser.add_argument("--turn-rate", type=float,
+                        help="schedule input fairly, allowing each session this many turns "
+                             "per second (0 for no limit)")
+    parser.add_argument("--queue", type=int, default=32,
+                        help="with --turn-rate, lines of input each session can have waiting")
+    parser.add_argument("--queue-full", choices=("block", "drop"), default="block",
+                        help="with --turn-rate, stop reading from a client whose queue is "
+                             "full, or drop its input")
+    args = parser.parse_args()
+    stats = None
+    if args.stats:
+        stats = Instrumentation()
+        stats.dump_on_signal()
+    writer = telemetry = None
+    if args.telemetry:
+        writer = TelemetryWriter(args.telemetry)
+        telemetry = TurnTelemetry(writer)
+    scheduler = None
+    if args.turn_rate is not None:
+        scheduler = TurnScheduler(args.turn_rate, max_queue=args.queue, policy=args.queue_full)
+    try:
+        asyncio.run(main(args.host, args.port, args.idle_timeout, stats, telemetry, scheduler))
+    finally:
+        if writer is not None:
+            writer.close()
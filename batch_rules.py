@@ -0,0 +1,155 @@
+""""
+Item event checks for many sessions at once, using NumPy.
+
+A process hosting many sessions normally checks item events for each one
+separately (see item_rules.py). BatchItemEvents instead puts every
+session's inventory and location contents into rows of two item bitset
+matrices and evaluates every rule for every session in a few array
+operations, then runs the outcomes for each session in rule order, just
+as Adventure.item_events_full_check() would. If an outcome moves items or
+the player, the rest of that session's rules are evaluated again, so the
+results are always the same as checking each session on its own.
+
+NumPy is optional - only needed if this module is used.
+
+    batch = BatchItemEvents(event_index)
+    outputs = batch.step(games, commands)
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class BatchItemEvents(object):
+    """Evaluates item events for many sessions of the same world together
+    Args:
+        index - ItemEventIndex of the events being played
+    """
+    def __init__(self, index):
+        if numpy is None:
+            raise ImportError("BatchItemEvents needs NumPy")
+        self.index = index
+        events = index.events
+        # Item key -> matrix column, for every item a rule mentions
+        self.columns = {item: n for n, item in enumerate(index.rules_by_item)}
+        # Extra column, set in every row, used to pad rules' lists of needs
+        self.present = len(self.columns)
+        self.player_needs = self.need_matrix(("player_needs",))
+        # location_not_needs are checked just like location_needs, because
+        # Adventure.items_present_check() never applies its invert flag
+        self.location_needs = self.need_matrix(("location_needs", "location_not_needs"))
+        self.has_pass = numpy.array([bool(event.get("pass_outcome")) for event in events])
+        self.has_fail = numpy.array([bool(event.get("fail_outcome")) for event in events])
+        # Location key -> columns of the items it starts with, shared by
+        # sessions that haven't changed the location
+        self.base_columns = {}
+
+    def need_matrix(self, kinds):
+        """Return matrix of the columns each rule needs set (one row per rule)
+        Rows are padded with the always-set column.
+        Args:
+            kinds - keys of the needs dictionary to include
+        """
+        needs = []
+        for event in self.index.events:
+            event_needs = event.get("needs", {})
+            needs.append(sorted({self.columns[item] for kind in kinds
+                                 for item in event_needs.get(kind, ())}))
+        width = max([len(columns) for columns in needs] + [1])
+        matrix = numpy.full((len(needs), width), self.present, dtype=numpy.intp)
+        for n, columns in enumerate(needs):
+            matrix[n, :len(columns)] = columns
+        return matrix
+
+    def item_columns(self, things):
+        """Return array of the columns of the items rules mention"""
+        columns = self.columns
+        return numpy.array([columns[item] for item in things if item in columns],
+                           dtype=numpy.intp)
+
+    def location_columns(self, game):
+        """Return array of the columns of items in a session's location"""
+        key = game.location_key
+        if game.world.version(key):
+            return self.item_columns(game.location_things)
+        columns = self.base_columns.get(key)
+        if columns is None:
+            columns = self.base_columns[key] = self.item_columns(game.world.things(key))
+        return columns
+
+    def evaluate(self, games):
+        """Return matrix of rule results - one row per session, one column per rule"""
+        width = self.present + 1
+        inventory = numpy.zeros((len(games), width), dtype=bool)
+        location = numpy.zeros((len(games), width), dtype=bool)
+        inventory[:, self.present] = True
+        location[:, self.present] = True
+        for row, game in enumerate(games):
+            inventory[row, self.item_columns(game.inventory)] = True
+            location[row, self.location_columns(game)] = True
+        # Rule passes when every item it needs is present
+        return (inventory[:, self.player_needs].all(axis=2)
+                & location[:, self.location_needs].all(axis=2))
+
+    def check(self, games):
+        """Run the outcomes of all item events for each session
+        Does the same as calling item_events_check() for each one. Sessions
+        checked this way have no use for their event trackers - call
+        game.event_tracker.reset() before checking one with item_events_check() again.
+        Args:
+            games - list of Adventure sessions playing this index's events
+        """
+        if not games:
+            return
+        events = self.index.events
+        passed = self.evaluate(games)
+        active = numpy.where(passed, self.has_pass, self.has_fail)
+        for row, game in enumerate(games):
+            tracker = game.event_tracker
+            tracker.touched.clear()
+            tracker.evaluated = len(events)
+            tracker.fired = 0
+            results = passed[row]
+            rules = numpy.flatnonzero(active[row]).tolist()
+            position = 0
+            while position < len(rules):
+                n = rules[position]
+                position += 1
+                location = game.location_key
+                version = game.world.version(location)
+                game.event_outcomes(**events[n]["pass_outcome" if results[n] else "fail_outcome"])
+                tracker.fired += 1
+                if game.location_key != location or game.world.version(location) != version:
+                    # Outcome moved something - evaluate the rules still to come again
+                    results = self.evaluate([game])[0]
+                    later = numpy.where(results[n + 1:], self.has_pass[n + 1:],
+                                        self.has_fail[n + 1:])
+                    rules = (numpy.flatnonzero(later) + n + 1).tolist()
+                    tracker.evaluated += len(events) - n - 1
+                    position = 0
+
+    def step(self, games, commands):
+        """Play one turn in each session, checking item events for all of them together
+        Same as calling game.step(command) for each session.
+        Args:
+            games - list of Adventure sessions playing this index's events
+            commands - line of input for each session
+        Returns:
+            list of output for each session
+        """
+        turns = [game.begin_turn(command) for game, command in zip(games, commands)]
+        # Commands on one line are played in rounds - the first of each
+        # session's commands, then item events, then the second...
+        playing = [(game, parts) for game, parts in zip(games, turns) if parts]
+        n = 0
+        while playing:
+            for game, parts in playing:
+                game.play_command(parts[n])
+            self.check([game for game, parts in playing])
+            n += 1
+            # Rest of line is dropped once quitting
+            playing = [(game, parts) for game, parts in playing
+                       if n < len(parts) and not game.confirming_quit]
+        return [game.end_turn() for game in games]
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark - item event checks batched across sessions with NumPy.
+Plays the same random commands in many sessions twice: once with each
+session checking its own item events, once with BatchItemEvents checking
+every session together. Checks that every session's output and final
+state are identical, then reports the time per turn of each. Needs NumPy.
+
+Usage: python benchmarks/bench_batch_rules.py [sessions] [rules] [turns] [seed]
+"""
+
+import os
+import random
+import sys
+import time
+
+# Let the benchmark find the game modules in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adventure_data import intro_text, items
+from adventure_engine import Adventure
+from batch_rules import BatchItemEvents
+from bench_item_events import make_rules
+from item_rules import ItemEventIndex
+from session_store import dump_session
+
+VERBS = ["take", "drop", "examine", "open", "look", "inv", "n", "s", "e", "w", "u", "d"]
+NOUNS = list(items) + ["all"]
+
+
+def random_command(rng):
+    """Return a random command, sometimes several on one line"""
+    commands = []
+    for _ in range(1 if rng.random() < 0.8 else rng.randint(2, 3)):
+        verb = rng.choice(VERBS)
+        commands.append(verb + " " + rng.choice(NOUNS) if len(verb) > 1 else verb)
+    return ", ".join(commands)
+
+
+def play(index, session_count, turns, seed, batch=None):
+    """Play random commands in every session
+    Returns:
+        (list of each session's outputs, list of sessions, seconds spent playing)
+    """
+    rng = random.Random(seed)
+    games = [Adventure(start_text=intro_text, event_index=index, seed=n)
+             for n in range(session_count)]
+    outputs = [[game.start()] for game in games]
+    spent = 0.0
+    for _ in range(turns):
+        commands = [random_command(rng) for _ in games]
+        start = time.perf_counter()
+        if batch is None:
+            results = [game.step(command) for game, command in zip(games, commands)]
+        else:
+            results = batch.step(games, commands)
+        spent += time.perf_counter() - start
+        for output, result in zip(outputs, results):
+            output.append(result)
+    return outputs, games, spent
+
+
+if __name__ == "__main__":
+    session_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rule_count = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    turns = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+    index = ItemEventIndex(make_rules(rule_count, random.Random(seed)))
+
+    single, single_games, single_time = play(index, session_count, turns, seed)
+    batched, batched_games, batched_time = play(index, session_count, turns, seed,
+                                                BatchItemEvents(index))
+    for n, (a, b) in enumerate(zip(single, batched)):
+        for turn, (x, y) in enumerate(zip(a, b)):
+            if x != y:
+                print("MISMATCH in session {} at turn {}".format(n, turn))
+                print("per session:", x)
+                print("batched:    ", y)
+                sys.exit(1)
+    for n, (a, b) in enumerate(zip(single_games, batched_games)):
+        if dump_session(a) != dump_session(b):
+            sys.exit("MISMATCH in final state of session {}".format(n))
+
+    session_turns = session_count * turns
+    print("Sessions: {}  Rules: {}  Turns: {}  Output identical: yes".format(
+        session_count, len(index), turns))
+    print("  per session: {:.1f} us/turn".format(single_time / session_turns * 1e6))
+    print("  batched:     {:.1f} us/turn".format(batched_time / session_turns * 1e6))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark - incremental item event checks against a full scan.
+Builds a large set of random item event rules over the stock items, plays
+the same random commands with incremental checks and with a full scan of
+every rule, and checks that both produce identical output. Then reports
+the mean cost of item_events_check per turn for each.
+
+Usage: python benchmarks/bench_item_events.py [rules] [turns] [seed]
+"""
+
+import os
+import random
+import sys
+import time
+
+# Let the benchmark find the game modules in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adventure_data import intro_text, items, item_events
+from adventure_engine import Adventure
+from item_rules import ItemEventIndex
+
+
+VERBS = ["take", "drop", "examine", "look", "inv", "n", "s", "e", "w", "u", "d"]
+NOUNS = list(items) + ["all"]
+
+
+class FullScan(Adventure):
+    """Adventure that evaluates every item event on every turn"""
+    item_events_check = Adventure.item_events_full_check
+
+
+def make_rules(count, rng):
+    """Return the stock item events plus count random ones"""
+    # Items that never appear in the world, as in a large world where most
+    # rules concern items far away from the player
+    elsewhere = ["widget{}".format(n) for n in range(200)]
+    rules = list(item_events)
+    for n in range(count):
+        pool = list(items) if rng.random() < 0.1 else elsewhere
+        needs = {}
+        while not needs:
+            for kind in ("player_needs", "location_needs", "location_not_needs"):
+                if rng.random() < 0.5:
+                    needs[kind] = rng.sample(pool, rng.randint(1, 2))
+        rule = {"needs": needs}
+        if rng.random() < 0.5:
+            rule["pass_outcome"] = {"message": "Rule {} passes.".format(n)}
+            if rng.random() < 0.05:
+                rule["pass_outcome"]["remove_location_items"] = rng.sample(pool, 1)
+        if rng.random() < 0.01:
+            rule["fail_outcome"] = {"message": "Rule {} fails.".format(n)}
+        rules.append(rule)
+    return rules
+
+
+def play(game_class, index, commands, seed):
+    """Play commands, timing item_events_check
+    Returns:
+        (list of output per turn, seconds spent in item_events_check)
+    """
+    game = game_class(start_text=intro_text, event_index=index, seed=seed)
+    outputs = [game.start()]
+    spent = 0.0
+    for command in commands:
+        game.read_input(command)
+        game.parse()
+        start = time.perf_counter()
+        game.item_events_check()
+        spent += time.perf_counter() - start
+        outputs.append(game.flush_output())
+    return outputs, spent
+
+
+if __name__ == "__main__":
+    rule_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    rng = random.Random(seed)
+    index = ItemEventIndex(make_rules(rule_count, rng))
+    commands = []
+    for _ in range(turns):
+        verb = rng.choice(VERBS)
+        commands.append(verb + " " + rng.choice(NOUNS) if len(verb) > 1 else verb)
+
+    incremental, incremental_time = play(Adventure, index, commands, seed)
+    full, full_time = play(FullScan, index, commands, seed)
+    for turn, (a, b) in enumerate(zip(incremental, full)):
+        if a != b:
+            print("MISMATCH at turn {} ({!r})".format(turn, commands[turn - 1]))
+            print("incremental:", a)
+            print("full scan:  ", b)
+            sys.exit(1)
+    print("Rules: {}  Turns: {}  Output identical: yes".format(len(index), turns))
+    print("  full scan:   {:.1f} us/turn".format(full_time / turns * 1e6))
+    print("  incremental: {:.1f} us/turn".format(incremental_time / turns * 1e6))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark - memory used by many sessions.
+Compares RSS growth for N sessions where each gets a deepcopy of the world
+against N sessions sharing the base world through WorldState overlays.
+Each session takes and drops a few items so it has some changes to keep.
+Each mode runs in its own child process so the measurements are independent.
+
+Usage: python benchmarks/bench_memory.py [sessions] [world_copies]
+    world_copies - repeat the stock locations this many times to make a bigger world
+"""
+
+import copy
+import os
+import subprocess
+import sys
+
+# Let the benchmark find the game modules in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adventure_data import intro_text, items, locations
+from adventure_engine import Adventure
+from world_state import BaseThings, WorldState
+
+
+# Commands played by every session - leaves the pass in the Atrium
+SCRIPT = ["take pass", "n", "drop pass", "look"]
+
+
+def rss_kb():
+    """Return current resident set size of this process in KB"""
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def enlarge(base, copies):
+    """Return locations with every stock location repeated copies times.
+    Copies of a location link to each other's copies, so the world stays playable.
+    """
+    world = dict(base)
+    for n in range(1, copies):
+        for key, location in base.items():
+            new = copy.deepcopy(location)
+            new["exits"] = {d: "{}#{}".format(dest, n) for d, dest in location.get("exits", {}).items()}
+            world["{}#{}".format(key, n)] = new
+    return world
+
+
+def measure(mode, session_count, copies):
+    """Create sessions in this process and return RSS growth in KB"""
+    world = enlarge(locations, copies)
+    # Overlays share the world's indexed starting things, as the engine's do
+    base = BaseThings(world, items)
+    before = rss_kb()
+    sessions = []
+    for _ in range(session_count):
+        if mode == "deepcopy":
+            state = WorldState(copy.deepcopy(world))
+        else:
+            state = WorldState(world, items, base)
+        game = Adventure(start_text=intro_text, world=state)
+        for command in SCRIPT:
+            game.step(command)
+        game.flush_output()
+        sessions.append(game)
+    return rss_kb() - before
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        print(measure(sys.argv[2], int(sys.argv[3]), int(sys.argv[4])))
+        sys.exit()
+
+    session_count = sys.argv[1] if len(sys.argv) > 1 else "10000"
+    copies = sys.argv[2] if len(sys.argv) > 2 else "1"
+    print("Sessions: {}  Locations: {}".format(session_count, len(locations) * int(copies)))
+    for mode in ("deepcopy", "overlay"):
+        result = subprocess.run([sys.executable, __file__, "--child", mode, session_count, copies],
+                                stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        growth = int(result.stdout)
+        print("  {:<9} RSS growth: {:>8} KB  ({:.2f} KB/session)".format(
+            mode, growth, growth / int(session_count)))
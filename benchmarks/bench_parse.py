@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark - per-command parse() latency.
+Compares the class-level verb table against the old approach, where parse()
+defined its verb functions, verb map and direction list afresh on every call.
+The old approach is reproduced by LegacyParse below for comparison.
+
+Usage: python benchmarks/bench_parse.py [repeats]
+"""
+
+import os
+import random
+import sys
+import time
+
+# Let the benchmark find the game modules in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adventure_data import intro_text
+from adventure_engine import Adventure
+
+
+# Commands that leave the game state unchanged, so every repeat does the same work
+COMMANDS = ["inv", "exits", "examine pass", "xyzzy", "take", "drop fish"]
+
+
+class LegacyParse(Adventure):
+    """Adventure with parse() rebuilt per call, as it was before the verb table"""
+    def parse(self):
+        def v_go(noun):
+            Adventure.v_go(self, noun)
+
+        def v_drop(noun):
+            Adventure.v_drop(self, noun)
+
+        def v_take(noun):
+            Adventure.v_take(self, noun)
+
+        def v_examine(item):
+            Adventure.v_examine(self, item)
+
+        def v_exits(_):
+            Adventure.v_exits(self, _)
+
+        def v_help(_):
+            Adventure.v_help(self, _)
+
+        def v_inv(_):
+            Adventure.v_inv(self, _)
+
+        def v_look(_):
+            Adventure.v_look(self, _)
+
+        def v_quit(_):
+            Adventure.v_quit(self, _)
+
+        ci = self.current_input
+        if not ci[1] and ci[0] in (self.directions + [c[0] for c in self.directions]):
+            ci[1] = ci[0]
+            ci[0] = "go"
+
+        verb_to_fn_map = {"exits": v_exits,
+                          "go": v_go,
+                          "get": v_take,
+                          "examine": v_examine,
+                          "help": v_help,
+                          "inv": v_inv,
+                          "inventory": v_inv,
+                          "take": v_take,
+                          "drop": v_drop,
+                          "look": v_look,
+                          "quit": v_quit,
+                          }
+
+        verb_fn = verb_to_fn_map.get(ci[0], "")
+        if verb_fn:
+            verb_fn(ci[1])
+        else:
+            message = random.choice(["Don't undersand what you said.",
+                                     "Eh?",
+                                     "Do what?",
+                                     "Urgle?",
+                                     "Kindly rephrase."])
+            self.show(message)
+
+
+def time_parse(game_class, repeats):
+    """Time parse() for each of COMMANDS
+    Args:
+        game_class - Adventure class to benchmark
+        repeats (int) - number of times each command is parsed
+    Returns:
+        mean latency per command in microseconds
+    """
+    game = game_class(start_text=intro_text)
+    game.start()
+    total = 0.0
+    for command in COMMANDS:
+        for _ in range(repeats):
+            game.read_input(command)
+            start = time.perf_counter()
+            game.parse()
+            total += time.perf_counter() - start
+            game.output.clear()
+    return total / (repeats * len(COMMANDS)) * 1e6
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    before = time_parse(LegacyParse, repeats)
+    after = time_parse(Adventure, repeats)
+    print("Per-command parse latency")
+    print("  before (per-call closures): {:.2f} us".format(before))
+    print("  after (class verb table):   {:.2f} us".format(after))
+    print("  speed-up: {:.2f}x".format(before / after))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark - throughput of a SessionPool with increasing numbers of workers.
+Plays the same batches of turns for many sessions with 1, 2, 4... worker
+processes (up to the number of cores) and reports turns per second, then
+the per-worker report for the largest pool.
+
+Also checks that sessions keep their state when a worker is killed, both
+between batches and partway through one, and when one is drained.
+
+Usage: python benchmarks/bench_pool.py [sessions] [turns] [max_workers]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Let the benchmark find the game modules in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adventure_data import intro_text
+from adventure_engine import Adventure, verb
+from session_pool import LOST_TURN, UNREPORTED_TURN, SessionPool
+
+SCRIPT = ["take pass", "n", "n", "take cake", "s", "drop cake", "e", "u",
+          "n", "take paper", "s", "d", "take all", "look", "inv", "exa pass"]
+
+
+class CrashingAdventure(Adventure):
+    """Game with a "crash" command that kills the worker process playing it"""
+    @verb("crash")
+    def v_crash(self, _):
+        os._exit(1)
+
+
+def new_crashing_session():
+    """Return a new CrashingAdventure of the stock game"""
+    return CrashingAdventure(start_text=intro_text)
+
+
+def throughput(workers, session_count, turns, batch_size=500):
+    """Return (turns per second, pool report) for a pool of workers"""
+    rng = random.Random(1)
+    # A session plays at most one turn per batch
+    batch_size = min(batch_size, session_count)
+    ids = ["player{}".format(n) for n in range(session_count)]
+    progress = dict.fromkeys(ids, 0)
+    with tempfile.TemporaryDirectory() as directory:
+        pool = SessionPool(directory, workers, max_hot=session_count)
+        pool.step_many([(session_id, None) for session_id in ids])
+        played = 0
+        start = time.perf_counter()
+        while played < turns:
+            batch = []
+            for session_id in rng.sample(ids, min(batch_size, turns - played)):
+                batch.append((session_id, SCRIPT[progress[session_id] % len(SCRIPT)]))
+                progress[session_id] += 1
+            pool.step_many(batch)
+            played += len(batch)
+        spent = time.perf_counter() - start
+        report = pool.report()
+        pool.close()
+    return played / spent, report
+
+
+def check_recovery():
+    """Check sessions survive a worker being killed and being drained"""
+    with tempfile.TemporaryDirectory() as directory:
+        pool = SessionPool(directory, workers=2, new_session=new_crashing_session,
+                           snapshot_every=3)
+        pool.open("alice")
+        for command in ("take pass", "n", "look", "look"):
+            pool.step("alice", command)
+        worker = pool.worker_for("alice")
+        worker.process.kill()
+        worker.process.join()
+        # First turn after the crash is lost, then the session is restored
+        pool.step("alice", "inv")
+        if "Security Pass" not in pool.step("alice", "inv"):
+            sys.exit("Session lost its inventory when its worker was killed")
+
+        # Killed partway through a batch - turns already played must not be
+        # reported as lost, or a player retrying them plays them twice
+        worker = pool.worker_for("alice")
+        bob = next(session_id for session_id in ("bob{}".format(n) for n in range(100))
+                   if pool.worker_for(session_id) is worker)
+        pool.open(bob)
+        outputs = pool.step_many([("alice", "n"), (bob, "crash"), (bob, "look")])
+        if outputs != [UNREPORTED_TURN, LOST_TURN, LOST_TURN]:
+            sys.exit("Wrong outputs for a batch its worker crashed in: {}".format(outputs))
+        if "[Coffee Shop]" not in pool.step("alice", "look"):
+            sys.exit("Turn played before a crash was lost")
+
+        pool.drain(worker.number)
+        if pool.worker_for("alice") is worker:
+            sys.exit("Session wasn't moved off the drained worker")
+        if "Security Pass" not in pool.step("alice", "inv"):
+            sys.exit("Session lost its inventory when its worker was drained")
+        pool.close()
+    print("Crash and drain checks passed")
+
+
+if __name__ == "__main__":
+    session_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    check_recovery()
+    print("Cores: {}".format(os.cpu_count()))
+    workers = 1
+    while True:
+        rate, report = throughput(workers, session_count, turns)
+        print("{:>3} workers: {:>9.0f} turns/s".format(workers, rate))
+        if workers >= max_workers:
+            break
+        workers = min(workers * 2, max_workers)
+    print(report, end="")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark - restoring sessions from their command logs.
+Plays sessions of increasing length with a SessionJournal, then throws the
+session away (as if the process had crashed) and restores it, with periodic
+snapshots and by replaying the whole log. Checks the restored session
+matches the original and carries on giving exactly the same output, and
+that a command only partly written to the log (as when the process dies
+mid-write) doesn't spoil the commands logged after it.
+
+Usage: python benchmarks/bench_restore.py [snapshot_every]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Let the benchmark find the game modules in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adventure_data import intro_text
+from adventure_engine import Adventure
+from session_log import SessionJournal
+from session_store import SessionManager, dump_session
+
+COMMANDS = ["take pass", "n", "s", "e", "w", "u", "d", "take all", "drop all",
+            "look", "inv", "exa cake", "xyzzy", "open cake", "take cake, drop cake"]
+
+
+def new_session():
+    return Adventure(start_text=intro_text)
+
+
+def restore_time(turns, snapshot_every, seed=1):
+    """Play a session, lose it and restore it from its journal
+    Returns:
+        seconds taken to restore
+    """
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        journal = SessionJournal(os.path.join(directory, "journal"), snapshot_every)
+        manager = SessionManager(os.path.join(directory, "evicted"), new_session,
+                                 journal=journal)
+        manager.open("player")
+        for _ in range(turns):
+            manager.step("player", rng.choice(COMMANDS))
+        original = manager.hot.pop("player")
+
+        start = time.perf_counter()
+        restored = manager.get("player")
+        spent = time.perf_counter() - start
+
+        if dump_session(restored) != dump_session(original):
+            sys.exit("Restored session differs after {} turns".format(turns))
+        for _ in range(50):
+            command = rng.choice(COMMANDS)
+            if restored.step(command) != original.step(command):
+                sys.exit("Restored session played differently after {} turns".format(turns))
+        journal.close()
+    return spent
+
+
+def check_torn_tail(seed=1):
+    """Restore a session whose log ends in a partly written command, play on
+    and check a second restore matches
+    """
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        journal = SessionJournal(os.path.join(directory, "journal"), 1000)
+        manager = SessionManager(os.path.join(directory, "evicted"), new_session,
+                                 journal=journal)
+        manager.open("player")
+        for _ in range(20):
+            manager.step("player", rng.choice(COMMANDS))
+        manager.hot.pop("player")
+        journal.release("player")
+        # Length says 4 bytes but only 2 made it
+        with open(journal.path("player", ".log"), "ab") as log:
+            log.write(b"\x04lo")
+        manager.get("player")
+        for _ in range(20):
+            manager.step("player", rng.choice(COMMANDS))
+        original = manager.hot.pop("player")
+        restored = manager.get("player")
+        if dump_session(restored) != dump_session(original):
+            sys.exit("Restored session differs after a partly written command")
+        journal.close()
+
+
+if __name__ == "__main__":
+    check_torn_tail()
+    snapshot_every = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print("{:>8} {:>22} {:>18}".format("turns", "snapshot every {}".format(snapshot_every),
+                                       "whole log"))
+    for turns in (100, 1000, 10000, 50000):
+        with_snapshots = restore_time(turns, snapshot_every)
+        whole_log = restore_time(turns, turns + 1)
+        print("{:>8} {:>19.2f} ms {:>15.2f} ms".format(
+            turns, with_snapshots * 1e3, whole_log * 1e3))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+"""
+Fairness test - interactive clients sharing a server with flooding ones.
+Starts adventure_server.py in a separate process, connects some clients that
+paste hundreds of commands at once and some that send one command at a time,
+and reports the interactive clients' reply latency - first with input played
+as soon as it's read, then with the TurnScheduler, without a turn budget and
+with one that the flooders exceed but the interactive clients don't.
+
+Usage: python benchmarks/bench_scheduler.py [interactive_clients] [flooders] [flood_lines]
+"""
+
+import asyncio
+import subprocess
+import sys
+
+from bench_server import GAME_DIR, SCRIPT, client, free_port, wait_for_server
+
+
+async def flooder(port, lines):
+    """Paste lines commands at once, then read replies until the server stops sending"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await reader.readuntil(b">")
+    writer.write(b"".join(SCRIPT[n % len(SCRIPT)].encode() + b"\r\n" for n in range(lines)))
+    try:
+        while await reader.read(65536):
+            pass
+    except ConnectionError:
+        pass
+
+
+async def run(port, clients, commands, flooders, flood_lines):
+    """Start the flooders, then play the interactive clients
+    Returns:
+        list of the interactive clients' reply latencies
+    """
+    floods = [asyncio.ensure_future(flooder(port, flood_lines)) for _ in range(flooders)]
+    # Let the flood arrive first
+    await asyncio.sleep(0.05)
+    latencies = []
+    await asyncio.gather(*[client(port, commands, latencies) for _ in range(clients)])
+    for flood in floods:
+        flood.cancel()
+    return latencies
+
+
+def measure(options, clients, commands, flooders, flood_lines):
+    """Return sorted interactive reply latencies against a server run with options"""
+    port = free_port()
+    server = subprocess.Popen([sys.executable, "adventure_server.py", "--port", str(port)]
+                              + options, cwd=GAME_DIR, stdout=subprocess.DEVNULL)
+    try:
+        wait_for_server(port)
+        return sorted(asyncio.run(run(port, clients, commands, flooders, flood_lines)))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    flooders = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    flood_lines = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+    commands = 20
+    print("{} interactive clients x {} commands, {} flooders x {} lines".format(
+        clients, commands, flooders, flood_lines))
+    print("{:<28} {:>10} {:>10} {:>10}".format("server", "p50 ms", "p99 ms", "max ms"))
+    for name, options in [("unscheduled", []),
+                          ("scheduled, no limit", ["--turn-rate", "0"]),
+                          ("scheduled, 200 turns/s", ["--turn-rate", "200"])]:
+        latencies = measure(options, clients, commands, flooders, flood_lines)
+        turns = len(latencies)
+        print("{:<28} {:>10.2f} {:>10.2f} {:>10.2f}".format(
+            name, latencies[turns // 2] * 1000, latencies[int(turns * 0.99)] * 1000,
+            latencies[-1] * 1000))
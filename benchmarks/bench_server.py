@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+Load test - concurrent sessions over loopback TCP.
+Starts adventure_server.py in a separate process (so it has a core to
+itself) and connects N clients from this process. Each client sends its
+commands one at a time, waiting for each reply, and the test reports turns
+per second handled by the single server process and reply latency.
+
+Usage: python benchmarks/bench_server.py [clients] [commands_per_client]
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+GAME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Commands each client cycles through
+SCRIPT = ["look", "n", "take pass", "n", "e", "exits", "w", "inv",
+          "drop pass", "take all", "s", "help"]
+
+
+def free_port():
+    """Return a currently unused local port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def client(port, commands, latencies):
+    """Play commands over one connection, recording reply latency"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    # Every reply ends with the ">" prompt
+    await reader.readuntil(b">")
+    for n in range(commands):
+        start = time.perf_counter()
+        writer.write(SCRIPT[n % len(SCRIPT)].encode() + b"\r\n")
+        await reader.readuntil(b">")
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def run(port, clients, commands):
+    """Connect all clients and play
+    Returns:
+        (list of reply latencies, elapsed seconds)
+    """
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[client(port, commands, latencies) for _ in range(clients)])
+    return latencies, time.perf_counter() - start
+
+
+def wait_for_server(port, timeout=10):
+    """Wait until server accepts connections"""
+    give_up = time.time() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return
+        except OSError:
+            if time.time() > give_up:
+                raise
+            time.sleep(0.05)
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    commands = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    port = free_port()
+    server = subprocess.Popen([sys.executable, "adventure_server.py", "--port", str(port)],
+                              cwd=GAME_DIR, stdout=subprocess.DEVNULL)
+    try:
+        wait_for_server(port)
+        latencies, seconds = asyncio.run(run(port, clients, commands))
+    finally:
+        server.terminate()
+        server.wait()
+    latencies.sort()
+    turns = len(latencies)
+    print("Concurrent sessions: {}  Turns: {}  Time: {:.2f}s".format(clients, turns, seconds))
+    print("Server turns per second: {:.0f}".format(turns / seconds))
+    print("Reply latency p50: {:.2f} ms  p99: {:.2f} ms".format(
+        latencies[turns // 2] * 1000, latencies[int(turns * 0.99)] * 1000))
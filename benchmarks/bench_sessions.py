@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark - many game sessions interleaved in one process.
+Creates N headless Adventure sessions and feeds them commands round-robin,
+one turn per session at a time, then reports turns per second.
+
+Usage: python benchmarks/bench_sessions.py [sessions] [rounds]
+"""
+
+import os
+import sys
+import time
+
+# Let the benchmark find the game modules in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adventure_data import intro_text
+from adventure_engine import Adventure
+
+
+# Commands each session cycles through - a short walk around the ground floor
+SCRIPT = ["look", "n", "take pass", "n", "e", "exits", "w", "inv",
+          "drop pass", "take all", "s", "help"]
+
+
+def run(session_count=1000, rounds=20):
+    """Run the benchmark
+    Args:
+        session_count (int) - number of sessions to interleave
+        rounds (int) - number of commands sent to each session
+    Returns:
+        (turns, seconds)
+    """
+    sessions = [Adventure(start_text=intro_text) for _ in range(session_count)]
+    for session in sessions:
+        session.start()
+
+    turns = 0
+    start = time.perf_counter()
+    for n in range(rounds):
+        command = SCRIPT[n % len(SCRIPT)]
+        for session in sessions:
+            session.step(command)
+            turns += 1
+    return turns, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    session_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    turns, seconds = run(session_count, rounds)
+    print("Sessions: {}  Turns: {}  Time: {:.3f}s".format(session_count, turns, seconds))
+    print("Turns per second: {:.0f}".format(turns / seconds))
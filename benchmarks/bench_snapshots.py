@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark - session snapshots and rehydration.
+Plays random commands across many sessions through a SessionManager that
+keeps only a few sessions in memory, so most commands need a session to be
+loaded from disk. Reports snapshot sizes and rehydration latency.
+
+Usage: python benchmarks/bench_snapshots.py [sessions] [max_hot] [turns]
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+# Let the benchmark find the game modules in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adventure_data import intro_text
+from adventure_engine import Adventure
+from session_store import SessionManager, dump_session
+
+SCRIPT = ["take pass", "n", "n", "take cake", "s", "drop cake", "e", "u",
+          "n", "take paper", "s", "d", "take all", "look"]
+
+
+def percentile(values, fraction):
+    """Return value at fraction (0-1) through sorted values"""
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+if __name__ == "__main__":
+    session_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    max_hot = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    turns = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        manager = SessionManager(snapshot_dir, lambda: Adventure(start_text=intro_text),
+                                 max_hot=max_hot)
+        ids = ["player{}".format(n) for n in range(session_count)]
+        progress = dict.fromkeys(ids, 0)
+        for session_id in ids:
+            manager.open(session_id)
+        for _ in range(turns):
+            session_id = rng.choice(ids)
+            manager.step(session_id, SCRIPT[progress[session_id] % len(SCRIPT)])
+            progress[session_id] += 1
+        sizes = [len(dump_session(game)) for game in manager.hot.values()]
+        sizes += [os.path.getsize(os.path.join(snapshot_dir, name))
+                  for name in os.listdir(snapshot_dir)]
+
+    times = manager.rehydrate_times
+    print("Sessions: {}  In memory: {}  Turns: {}  Evictions: {}".format(
+        session_count, max_hot, turns, manager.evictions))
+    print("Snapshot size: mean {:.1f} bytes  max {} bytes".format(
+        sum(sizes) / len(sizes), max(sizes)))
+    print("Rehydrate latency: p50 {:.1f} us  p99 {:.1f} us  ({} rehydrations)".format(
+        percentile(times, 0.5) * 1e6, percentile(times, 0.99) * 1e6, len(times)))
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark suite for the engine's hot paths.
+Times parse, display_info, show, item_events_check, event_check and
+items_present_check separately, with fixed inputs, against the stock world
+a large generated world and a location holding thousands of items.
+Runs headless.
+
+Results can be saved as JSON and compared with a stored baseline - any case
+slower than the baseline by more than the threshold is flagged and the
+script exits with status 1.
+
+Usage: python benchmarks/hotpaths.py [--save results.json] [--baseline baseline.json]
+                                     [--threshold 0.25] [--quick]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+# Let the benchmark find the game modules in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adventure_data import intro_text, items, locations, item_events
+from adventure_engine import Adventure
+from world_compiler import compile_world
+from world_generator import generate_world
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def time_call(fn, repeat, rounds=5):
+    """Return best mean time per call of fn() in microseconds over several rounds"""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        mean = (time.perf_counter() - start) / repeat
+        best = mean if best is None else min(best, mean)
+    return best * 1e6
+
+
+def world_cases(name, game, repeat):
+    """Yield (case name, microseconds per call) for each hot path in a game"""
+    def parse():
+        game.read_input("inv")
+        game.parse()
+        game.output.clear()
+
+    def display_info():
+        game.display_info()
+        game.output.clear()
+
+    def show():
+        game.show("Crumbs litter the floor but the shelves are depleted.")
+        game.output.clear()
+
+    texts = ["Uncached text number {} which needs wrapping before it can be shown.".format(n)
+             for n in range(repeat)]
+    position = [0]
+
+    def show_uncached():
+        game.show(texts[position[0] % len(texts)] + str(position[0]))
+        position[0] += 1
+        game.output.clear()
+
+    def item_events_check():
+        game.item_events_check()
+        game.output.clear()
+
+    def item_events_full_check():
+        game.item_events_full_check()
+        game.output.clear()
+
+    needs = {"player_needs": ["pass"], "location_needs": list(game.location_things)[:1]}
+
+    def event_check():
+        game.event_check(**needs)
+
+    def items_present_check():
+        game.items_present_check(needs["location_needs"], in_inventory=False)
+
+    cases = [("parse", parse, repeat),
+             ("display_info", display_info, repeat),
+             ("show", show, repeat),
+             ("show_uncached", show_uncached, repeat),
+             ("item_events_check", item_events_check, repeat),
+             ("item_events_full_check", item_events_full_check, max(repeat // 100, 5)),
+             ("event_check", event_check, repeat),
+             ("items_present_check", items_present_check, repeat)]
+    for case, fn, count in cases:
+        # One call first, so one-off work like filling caches isn't counted
+        fn()
+        yield "{}/{}".format(name, case), time_call(fn, count)
+
+
+def hoard_cases(game, repeat, slow_repeat):
+    """Yield (case name, microseconds per call) for a location holding lots of items"""
+    def take_drop_all():
+        for command in ("take all", "drop all"):
+            game.read_input(command)
+            game.parse()
+            game.item_events_check()
+        game.output.clear()
+
+    def display_info():
+        game.display_info()
+        game.output.clear()
+
+    for case, fn, count in (("take_drop_all", take_drop_all, slow_repeat),
+                            ("display_info", display_info, repeat)):
+        fn()
+        yield "hoard/" + case, time_call(fn, count)
+
+
+def run(quick=False):
+    """Run all cases
+    Returns:
+        dictionary of case name -> microseconds per call
+    """
+    repeat = 200 if quick else 2000
+    results = {}
+
+    stock = Adventure(start_text=intro_text, compiled_world=compile_world(locations, items, item_events))
+    stock.start()
+    results.update(world_cases("stock", stock, repeat))
+
+    large_world = compile_world(*generate_world(rooms=2000 if quick else 10000, rules=5000))
+    large = Adventure(start_text=intro_text, compiled_world=large_world)
+    large.start()
+    results.update(world_cases("large", large, repeat))
+
+    # Start location piled high with items, to show costs that grow with
+    # the number of items in one place
+    hoard_world = compile_world(*generate_world(rooms=100, rules=1000, start_items=2000))
+    hoard = Adventure(start_text=intro_text, compiled_world=hoard_world)
+    hoard.start()
+    results.update(hoard_cases(hoard, repeat, 5 if quick else 20))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return list of (case, baseline us, current us) slower than baseline by more than threshold"""
+    regressions = []
+    for case, current in sorted(results.items()):
+        before = baseline.get(case)
+        if before and current > before * (1 + threshold):
+            regressions.append((case, before, current))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the engine's hot paths")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="JSON results to compare against (default benchmarks/baseline.json)")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="flag cases slower than baseline by more than this fraction")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats and smaller world")
+    args = parser.parse_args()
+
+    results = run(args.quick)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    for case, us in sorted(results.items()):
+        before = baseline.get(case)
+        change = " ({:+.0%} vs baseline)".format(us / before - 1) if before else ""
+        print("{:<36} {:>10.2f} us{}".format(case, us, change))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(),
+                       "machine": platform.machine(),
+                       "results": results}, f, indent=2, sort_keys=True)
+
+    regressions = compare(results, baseline, args.threshold)
+    for case, before, current in regressions:
+        print("REGRESSION {}: {:.2f} us -> {:.2f} us".format(case, before, current))
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+"""
+Load generator - populations of bot players against in-process sessions.
+For soak and throughput testing: bots play turns round-robin for as long as
+asked, and every interval the generator reports turns per second, turn
+latency percentiles and the process's memory, so long runs show leaks and
+slow degradation as well as raw speed.
+
+Bots:
+    walker  - wanders at random through the exits of each location
+    hoarder - spams "take all" and "drop all", now and then moving on
+    puzzler - plays the Entryway pass puzzle over and over: fails to get
+              through the gates, takes the pass, goes through and back,
+              drops the pass
+
+Usage: python benchmarks/load_generator.py [--walkers 200] [--hoarders 50] [--puzzlers 100]
+                                           [--duration 60] [--interval 5] [--lifetime 0]
+                                           [--rooms 0] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Let the benchmark find the game modules in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adventure_data import intro_text
+from adventure_engine import Adventure
+from bench_memory import rss_kb
+from instrumentation import Histogram
+from world_compiler import compile_world
+from world_generator import generate_world
+
+
+class Bot(object):
+    """Bot player - chooses each command from the state of its session
+    Args:
+        rng - random.Random for the bot's choices
+    """
+    def __init__(self, rng):
+        self.rng = rng
+
+    def begin(self):
+        """Called when the bot starts a new session"""
+
+    def command(self, game):
+        """Return next line of input for game"""
+        raise NotImplementedError
+
+
+class Walker(Bot):
+    """Wanders at random through exits"""
+    def command(self, game):
+        exits = game.available_exits()
+        if not exits or self.rng.random() < 0.1:
+            return self.rng.choice(["look", "exits", "inv"])
+        return self.rng.choice(exits)
+
+
+class Hoarder(Bot):
+    """Takes and drops everything in sight, moving on now and then"""
+    def __init__(self, rng):
+        super().__init__(rng)
+        self.taking = True
+
+    def command(self, game):
+        exits = game.available_exits()
+        if exits and self.rng.random() < 0.05:
+            return self.rng.choice(exits)
+        self.taking = not self.taking
+        return "drop all" if self.taking else "take all"
+
+
+class Puzzler(Bot):
+    """Plays the Entryway pass puzzle over and over, from the start location"""
+    SCRIPT = ["north", "take pass", "north", "south", "drop pass", "look"]
+
+    def __init__(self, rng):
+        super().__init__(rng)
+        self.position = 0
+
+    def begin(self):
+        self.position = 0
+
+    def command(self, game):
+        command = self.SCRIPT[self.position % len(self.SCRIPT)]
+        self.position += 1
+        return command
+
+
+BOT_TYPES = {"walker": Walker, "hoarder": Hoarder, "puzzler": Puzzler}
+
+
+class LoadGenerator(object):
+    """Runs a population of bots, each with its own session
+    Args:
+        population - dictionary of bot type ("walker", "hoarder", "puzzler") -> count
+        new_session - function returning a new Adventure session
+        lifetime (int) - turns before a bot starts a new session (0 for never)
+        seed - random seed for the bots
+    """
+    def __init__(self, population, new_session, lifetime=0, seed=1):
+        self.new_session = new_session
+        self.lifetime = lifetime
+        rng = random.Random(seed)
+        self.players = []
+        for kind, count in sorted(population.items()):
+            for _ in range(count):
+                self.players.append(self.new_player(BOT_TYPES[kind](random.Random(rng.random()))))
+        self.turns = 0
+        self.sessions = len(self.players)
+
+    def new_player(self, bot):
+        """Return [bot, new started session, turns played in session]"""
+        bot.begin()
+        game = self.new_session()
+        game.start()
+        return [bot, game, 0]
+
+    def play(self, seconds, latency):
+        """Play turns round-robin for about seconds
+        Args:
+            latency - Histogram to record turn latency in (microseconds)
+        Returns:
+            number of turns played
+        """
+        clock = time.perf_counter
+        stop = clock() + seconds
+        turns = 0
+        while clock() < stop:
+            for player in self.players:
+                bot, game, played = player
+                command = bot.command(game)
+                start = clock()
+                game.step(command)
+                latency.record((clock() - start) * 1e6)
+                player[2] = played + 1
+                if not game.keep_going or (self.lifetime and played + 1 >= self.lifetime):
+                    player[:] = self.new_player(bot)
+                    self.sessions += 1
+            turns += len(self.players)
+        self.turns += turns
+        return turns
+
+    def run(self, duration, interval, out=sys.stdout):
+        """Play for duration seconds, reporting every interval seconds
+        Returns:
+            list of (turns per second, p50, p99, p999 latency in us, RSS in KB) per interval
+        """
+        out.write("{:>8} {:>10} {:>9} {:>9} {:>9} {:>9} {:>10}\n".format(
+            "elapsed", "turns/s", "p50 us", "p99 us", "p999 us", "max us", "rss KB"))
+        intervals = []
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            latency = Histogram(scale=16)
+            began = time.perf_counter()
+            turns = self.play(min(interval, duration - (began - start)), latency)
+            rate = turns / (time.perf_counter() - began)
+            row = (rate, latency.percentile(0.5), latency.percentile(0.99),
+                   latency.percentile(0.999), rss_kb())
+            intervals.append(row)
+            out.write("{:>7.0f}s {:>10.0f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>10}\n".format(
+                time.perf_counter() - start, rate, row[1], row[2], row[3], latency.max, row[4]))
+        return intervals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run bot players against in-process sessions")
+    parser.add_argument("--walkers", type=int, default=200)
+    parser.add_argument("--hoarders", type=int, default=50)
+    parser.add_argument("--puzzlers", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run for")
+    parser.add_argument("--interval", type=float, default=5, help="seconds between reports")
+    parser.add_argument("--lifetime", type=int, default=0,
+                        help="turns before each bot starts a new session (0 for never)")
+    parser.add_argument("--rooms", type=int, default=0,
+                        help="play a generated world of this many rooms instead of the stock one")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    world = None
+    if args.rooms:
+        world = compile_world(*generate_world(rooms=args.rooms, seed=args.seed))
+
+    def new_session():
+        return Adventure(start_text=intro_text, compiled_world=world)
+
+    generator = LoadGenerator({"walker": args.walkers, "hoarder": args.hoarders,
+                               "puzzler": args.puzzlers}, new_session, args.lifetime, args.seed)
+    intervals = generator.run(args.duration, args.interval)
+    first, last = intervals[0], intervals[-1]
+    print("Turns: {}  Sessions: {}  Bots: {}".format(
+        generator.turns, generator.sessions, len(generator.players)))
+    print("Throughput first/last interval: {:.0f} / {:.0f} turns/s ({:+.0%})".format(
+        first[0], last[0], last[0] / first[0] - 1))
+    print("Memory growth since first interval: {:+} KB".format(last[4] - first[4]))
@@ -0,0 +1,59 @@
+""""
+Helpers for understanding abbreviated and chained commands.
+
+PrefixIndex finds the words starting with a prefix, so players can type
+"exa pas" for "examine pass". It keeps the words sorted and uses binary
+search, so it's built once (per class for verbs, per world for location
+names) rather than on every command. split_commands() breaks a line like
+"take pass, north, look" into separate commands.
+"""
+
+import re
+from bisect import bisect_left
+
+# Commands on one line are separated by commas, semicolons or "then"
+COMMAND_SEPARATORS = re.compile(r"[,;]|\bthen\b")
+
+
+class PrefixIndex(object):
+    """Sorted words, for finding those that start with a prefix
+    Args:
+        words - words to index
+    """
+    def __init__(self, words=()):
+        self.words = sorted(set(words))
+
+    def matches(self, prefix):
+        """Return sorted list of words starting with prefix
+        If prefix is itself one of the words, only that word is returned.
+        """
+        words = self.words
+        start = bisect_left(words, prefix)
+        if start < len(words) and words[start] == prefix:
+            return [prefix]
+        end = bisect_left(words, prefix + "\U0010ffff", start)
+        return words[start:end]
+
+
+def prefix_matches(prefix, words):
+    """Return words (from any iterable) starting with prefix, in their original order.
+    If prefix is itself one of the words, only that word is returned.
+    For small collections, such as the items the player can see, where
+    building an index would cost more than it saves.
+    """
+    found = []
+    for word in words:
+        if word == prefix:
+            return [word]
+        if word.startswith(prefix):
+            found.append(word)
+    return found
+
+
+def split_commands(line):
+    """Split line of input into separate commands, dropping empty ones
+    Returns:
+        list of commands - [""] if the line has nothing in it
+    """
+    commands = [command for command in COMMAND_SEPARATORS.split(line) if command.strip()]
+    return commands or [""]
@@ -0,0 +1,69 @@
+""""
+Ordered, hash-indexed collection of item keys.
+
+Inventories and location "things" used to be plain lists, so checking for,
+or removing, an item meant scanning the list - fine for a handful of
+items, but quadratic for "take all" in a room holding thousands. ItemList
+keeps the items in a dictionary, which remembers insertion order, so
+membership, adding and removing are O(1) and items are still listed in
+the order they arrived.
+"""
+
+
+class ItemList(object):
+    """Ordered set of item keys with a list-like interface
+    Args:
+        items - optional initial item keys
+    """
+    __slots__ = ("index",)
+
+    def __init__(self, items=()):
+        # Item key -> None. Dictionaries keep insertion order.
+        self.index = dict.fromkeys(items)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __eq__(self, other):
+        if isinstance(other, ItemList):
+            return list(self.index) == list(other.index)
+        if isinstance(other, (list, tuple)):
+            return list(self.index) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return "ItemList({!r})".format(list(self.index))
+
+    def append(self, item):
+        """Add item at the end (no change if already present)"""
+        self.index[item] = None
+
+    def extend(self, items):
+        """Add items at the end, in order"""
+        for item in items:
+            self.index[item] = None
+
+    def remove(self, item):
+        """Remove item - raises ValueError if not present, like list.remove"""
+        try:
+            del self.index[item]
+        except KeyError:
+            raise ValueError("{!r} not in ItemList".format(item)) from None
+
+    def discard(self, item):
+        """Remove item if present"""
+        self.index.pop(item, None)
+
+    def clear(self):
+        """Remove all items"""
+        self.index.clear()
+
+    def replace(self, items):
+        """Replace contents with items"""
+        self.index = dict.fromkeys(items)
@@ -0,0 +1,149 @@
+""""
+Incremental evaluation of item events.
+
+Checking every rule in item_events after every command gets slow once a
+world has thousands of rules. ItemEventIndex maps each item key to the
+rules that mention it, and is shared by all sessions playing the same
+rules. Each session has an ItemEventTracker, which remembers the rules
+whose last result has an outcome and which items have moved since, so only
+rules mentioning those items are re-evaluated. Outcomes are run in the same
+order, with the same results, as checking every rule in turn.
+"""
+
+import heapq
+
+
+class ItemEventIndex(object):
+    """Read-only index of item events by the items they mention
+    Args:
+        events - list of item event dictionaries (see item_events in adventure_data.py)
+    """
+    def __init__(self, events):
+        self.events = events
+        # Item key -> indices of rules that mention it
+        self.rules_by_item = {}
+        for n, event in enumerate(events):
+            needs = event.get("needs", {})
+            for kind in ("player_needs", "location_needs", "location_not_needs"):
+                for item in needs.get(kind, ()):
+                    rules = self.rules_by_item.setdefault(item, [])
+                    if not rules or rules[-1] != n:
+                        rules.append(n)
+
+    def __len__(self):
+        return len(self.events)
+
+    def rules_for(self, items):
+        """Return set of indices of rules mentioning any of the items"""
+        rules = set()
+        for item in items:
+            rules.update(self.rules_by_item.get(item, ()))
+        return rules
+
+
+class ItemEventTracker(object):
+    """Per-session state for incremental item event checks
+    Only rules that have been made dirty, and rules with an outcome to run,
+    are kept per session, so a session costs about the same however many
+    rules the world has.
+    Args:
+        index - ItemEventIndex for the events being played
+    """
+    def __init__(self, index):
+        self.index = index
+        # Every rule must be evaluated on the next check - set until the first
+        self.all_dirty = True
+        # Other rules that must be re-evaluated
+        self.dirty_rules = set()
+        # Rule index -> last result, for rules whose last result has an
+        # outcome to run
+        self.active_rules = {}
+        # Items added to/removed from inventory or a location since last check
+        self.touched = set()
+        # Location at last check
+        self.location_key = None
+        # Count of rules evaluated/fired by the last check
+        self.evaluated = 0
+        self.fired = 0
+
+    def reset(self):
+        """Forget all results, so every rule is re-evaluated on the next check"""
+        self.all_dirty = True
+        self.dirty_rules.clear()
+        self.active_rules.clear()
+        self.touched.clear()
+        self.location_key = None
+
+    def touch(self, *items):
+        """Record that items moved into or out of inventory or a location"""
+        self.touched.update(items)
+
+    def collect_dirty(self, game):
+        """Mark rules affected by items moved, or the location changed,
+        since the last call as needing re-evaluation.
+        Args:
+            game - Adventure being checked
+        Returns:
+            set of newly dirty rule indices
+        """
+        touched = self.touched
+        if game.location_key != self.location_key:
+            if self.location_key is not None:
+                # Anything present in only one of the old or new location
+                touched.update(set(game.world.things(self.location_key))
+                               .symmetric_difference(game.location_things))
+            self.location_key = game.location_key
+        if not touched:
+            return set()
+        dirty = self.index.rules_for(touched)
+        touched.clear()
+        self.dirty_rules.update(dirty)
+        return dirty
+
+    def check(self, game):
+        """Run outcomes of all item events, re-evaluating only dirty rules.
+        Args:
+            game - Adventure being checked
+        """
+        events = self.index.events
+        active = self.active_rules
+        dirty_rules = self.dirty_rules
+        self.collect_dirty(game)
+        evaluated = fired = 0
+        everything = self.all_dirty
+        self.all_dirty = False
+        # Process rules in the same order as a full scan
+        if everything:
+            pending = list(range(len(events)))
+        else:
+            pending = list(dirty_rules.union(active))
+            heapq.heapify(pending)
+        last = -1
+        while pending:
+            n = heapq.heappop(pending)
+            # Skip rule pushed again after it was already processed
+            if n <= last:
+                continue
+            last = n
+            event = events[n]
+            if everything or n in dirty_rules:
+                dirty_rules.discard(n)
+                passed = game.event_check(**event.get("needs", {}))
+                evaluated += 1
+                outcome = event.get("pass_outcome" if passed else "fail_outcome")
+                if outcome:
+                    active[n] = passed
+                else:
+                    active.pop(n, None)
+            else:
+                outcome = event.get("pass_outcome" if active[n] else "fail_outcome")
+            if outcome:
+                fired += 1
+                game.event_outcomes(**outcome)
+                # Outcome may have moved items - rules still to come get
+                # re-evaluated now, earlier ones on the next check
+                for dirty in self.collect_dirty(game):
+                    if dirty > n and not everything:
+                        heapq.heappush(pending, dirty)
+        self.evaluated = evaluated
+        self.fired = fired
@@ -0,0 +1,125 @@
+""""
+Output sinks - where a game session's output goes.
+
+The engine gathers all output for a turn and hands it to its sink in a
+single write, so a move that shows several paragraphs doesn't become lots
+of small writes to a socket or log pipe.
+"""
+
+import sys
+from collections import deque
+
+
+class OutputSink(object):
+    """Base class for output sinks - subclasses provide write()"""
+    def write(self, text):
+        """Write one turn's output
+        Args:
+            text - all output for the turn
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release anything held by the sink"""
+        pass
+
+
+class StdoutSink(OutputSink):
+    """Writes to standard output (used for the console game)"""
+    def write(self, text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+class BufferSink(OutputSink):
+    """Keeps output in memory
+    Each turn's output is kept as a separate entry in self.turns
+    """
+    def __init__(self):
+        self.turns = []
+
+    def write(self, text):
+        self.turns.append(text)
+
+    def getvalue(self):
+        """Return all output written so far"""
+        return "".join(self.turns)
+
+    def clear(self):
+        """Discard output written so far"""
+        self.turns.clear()
+
+
+class StreamSink(OutputSink):
+    """Writes to a file, or any file-like object
+    Args:
+        stream - object with write() method (and optionally flush())
+        encoding - when set, text is encoded and written as bytes
+                   (for binary files, e.g. socket.makefile("wb"))
+    """
+    def __init__(self, stream, encoding=None):
+        self.stream = stream
+        self.encoding = encoding
+
+    def write(self, text):
+        if self.encoding:
+            text = text.encode(self.encoding)
+        self.stream.write(text)
+        flush = getattr(self.stream, "flush", None)
+        if flush:
+            flush()
+
+    def close(self):
+        self.stream.close()
+
+
+class SocketSink(OutputSink):
+    """Writes to a connected socket with one sendall() per turn
+    Args:
+        sock - connected socket
+        encoding - text encoding used on the wire
+    """
+    def __init__(self, sock, encoding="utf-8"):
+        self.sock = sock
+        self.encoding = encoding
+
+    def write(self, text):
+        self.sock.sendall(text.encode(self.encoding))
+
+    def close(self):
+        self.sock.close()
+
+
+class ByteCountingSink(OutputSink):
+    """Wraps another sink, recording how many bytes each turn produced
+    Args:
+        sink - sink to pass output on to (or None to just count)
+        encoding - encoding used to count bytes
+        history (int) - number of recent turns whose byte counts are kept
+    """
+    def __init__(self, sink=None, encoding="utf-8", history=1000):
+        self.sink = sink
+        self.encoding = encoding
+        # Byte counts of recent turns, oldest first
+        self.recent = deque(maxlen=history)
+        self.turns = 0
+        self.total_bytes = 0
+        self.max_bytes = 0
+
+    def write(self, text):
+        size = len(text.encode(self.encoding))
+        self.recent.append(size)
+        self.turns += 1
+        self.total_bytes += size
+        if size > self.max_bytes:
+            self.max_bytes = size
+        if self.sink is not None:
+            self.sink.write(text)
+
+    def mean_bytes(self):
+        """Return mean bytes per turn (0 if nothing written)"""
+        return self.total_bytes / self.turns if self.turns else 0
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
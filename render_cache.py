@@ -0,0 +1,96 @@
+""""
+Cache of rendered text, shared by all sessions playing the same world.
+
+Wrapping text with textwrap is one of the more expensive parts of a turn,
+and most of what is shown (location descriptions, exits, standard
+messages) never changes. RenderCache keeps wrapped text and the lines
+built from location data, evicting the least recently used entries once
+max_entries is reached so memory stays flat however big the world is.
+"""
+
+import textwrap
+from collections import OrderedDict
+
+
+class RenderCache(object):
+    """Bounded least-recently-used cache of rendered text for one world
+    Args:
+        locations - locations dictionary of the world
+        items - items dictionary of the world
+        max_entries (int) - number of entries kept before evicting
+    """
+    def __init__(self, locations, items, max_entries=10000):
+        self.locations = locations
+        self.items = items
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, key, make, *args):
+        """Return cached value for key, creating it with make(*args) if not present"""
+        entries = self.entries
+        try:
+            value = entries[key]
+        except KeyError:
+            value = make(*args)
+            entries[key] = value
+            if len(entries) > self.max_entries:
+                # Drop least recently used
+                entries.popitem(last=False)
+        else:
+            entries.move_to_end(key)
+        return value
+
+    def wrap(self, text, line_length):
+        """Return text wrapped to line_length, one line per paragraph, ending in new line
+        Args:
+            text - text to be wrapped
+            line_length (int) - maximum line length
+        """
+        return self.get((text, line_length), wrap_paragraphs, text, line_length)
+
+    def exits_line(self, key):
+        """Return "Obvious exits" line for location
+        Args:
+            key - location key
+        """
+        return self.get(("exits", key), self.make_exits_line, key)
+
+    def seen_line(self, key):
+        """Return "You can see" line for location's original things ("" if none)
+        Args:
+            key - location key
+        """
+        return self.get(("seen", key), self.make_seen_line,
+                        self.locations[key].get("things", ()))
+
+    def make_exits_line(self, key):
+        """Build "Obvious exits" line for location"""
+        locations = self.locations
+        return "Obvious exits: " + " ".join(
+            ["[{} to {}]".format(direction.capitalize(), locations[location]["name"])
+             for direction, location in locations[key].get("exits", {}).items()])
+
+    def make_seen_line(self, things):
+        """Build "You can see" line for list of item keys ("" if empty)"""
+        if not things:
+            return ""
+        return "You can see: " + ", ".join(
+            ["{} ({})".format(self.items[item]["name"], item) for item in things])
+
+    def warm(self, line_length=80):
+        """Fill the cache for every location, rather than as they're visited"""
+        for key, location in self.locations.items():
+            self.wrap("[" + location["name"] + "]", line_length)
+            self.wrap(location["description"], line_length)
+            self.wrap(self.seen_line(key), line_length)
+            self.wrap(self.exits_line(key), line_length)
+
+
+def wrap_paragraphs(text, line_length):
+    """Wrap each paragraph in text separately, keeping paragraph breaks"""
+    # Using textwrap.fill to set line length. However, it also
+    # removes any new lines (even when drop_whitespace=False)
+    # causing existing paragraphs to be lost. So paragraphs are
+    # split first and textwrap applied to one paragraph at a time.
+    return "".join([textwrap.fill(paragraph, line_length) + "\n"
+                    for paragraph in text.splitlines()])
@@ -0,0 +1,151 @@
+""""
+Shortest routes between locations, for the "travel" command.
+
+RoomGraph is built from the exits in a world's locations and shared by all
+sessions playing it. For each destination asked about it does one
+breadth-first search backwards along the exits, giving the first step of
+the shortest route there from every other location. Locations are numbered
+(compiled ones by their IDs, see world_compiler.py), so each table is a
+compact array by location ID rather than a dictionary. These tables are
+kept (up to max_tables of them, least recently used dropped first) so later
+routes to the same place are just lookups. Call invalidate() if exits are
+changed.
+"""
+
+from array import array
+from collections import OrderedDict, deque
+
+from command_parser import PrefixIndex
+
+
+class RoomGraph(object):
+    """Route finder for one world's locations
+    Args:
+        locations - locations dictionary of the world
+        max_tables (int) - number of per-destination route tables kept
+    """
+    def __init__(self, locations, max_tables=1000):
+        self.locations = locations
+        self.max_tables = max_tables
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget everything worked out from the exits - call after they change"""
+        # Location key -> ID
+        self.ids = None
+        # Location ID -> key
+        self.keys = None
+        # Direction number -> direction
+        self.directions = None
+        # Location ID -> list of (ID of location leading to it, direction number)
+        self.incoming = None
+        # Lower case location name or key -> location key
+        self.names = None
+        # For finding abbreviated names
+        self.name_index = None
+        # Destination ID -> array by location ID of 1 + direction number of
+        # first step towards destination (0 if there's no route)
+        self.tables = OrderedDict()
+
+    def build(self):
+        """Build reverse exit graph and name lookup"""
+        ids = {}
+        keys = []
+        for key, location in self.locations.items():
+            # Compiled locations are numbered in order already
+            ids[key] = getattr(location, "id", len(keys))
+            keys.append(key)
+        directions = []
+        direction_numbers = {}
+        incoming = [[] for _ in keys]
+        names = {}
+        for key, location in self.locations.items():
+            source = ids[key]
+            for direction, destination in location.get("exits", {}).items():
+                if destination not in ids:
+                    continue
+                number = direction_numbers.get(direction)
+                if number is None:
+                    number = direction_numbers[direction] = len(directions)
+                    directions.append(direction)
+                incoming[ids[destination]].append((source, number))
+            names.setdefault(location["name"].lower(), key)
+        # Keys also work as names, unless a location already has that name
+        for key in keys:
+            names.setdefault(key.lower(), key)
+        self.ids = ids
+        self.keys = keys
+        self.directions = directions
+        self.incoming = incoming
+        self.names = names
+        self.name_index = PrefixIndex(names)
+
+    def find(self, name):
+        """Return key of location with name (or key), ignoring case (None if not found)"""
+        if self.names is None:
+            self.build()
+        return self.names.get(name.strip().lower())
+
+    def matches(self, prefix):
+        """Return keys of locations whose name (or key) starts with prefix, ignoring case
+        A location whose name is exactly prefix is the only match.
+        """
+        if self.names is None:
+            self.build()
+        keys = []
+        for name in self.name_index.matches(prefix.strip().lower()):
+            key = self.names[name]
+            if key not in keys:
+                keys.append(key)
+        return keys
+
+    def first_steps(self, destination):
+        """Return array by location ID of 1 + direction number (see
+        self.directions) of the first step of the shortest route to
+        destination, 0 where there's no route
+        Args:
+            destination - ID of destination
+        """
+        tables = self.tables
+        table = tables.get(destination)
+        if table is not None:
+            tables.move_to_end(destination)
+            return table
+        incoming = self.incoming
+        table = array("H", bytes(2 * len(incoming)))
+        queue = deque([destination])
+        while queue:
+            here = queue.popleft()
+            for source, number in incoming[here]:
+                if not table[source] and source != destination:
+                    table[source] = number + 1
+                    queue.append(source)
+        tables[destination] = table
+        if len(tables) > self.max_tables:
+            tables.popitem(last=False)
+        return table
+
+    def route(self, start, destination):
+        """Return list of directions of a shortest route (None if there isn't one)
+        Args:
+            start - key of starting location
+            destination - key of destination
+        """
+        if start == destination:
+            return []
+        if self.ids is None:
+            self.build()
+        ids = self.ids
+        if start not in ids or destination not in ids:
+            return None
+        table = self.first_steps(ids[destination])
+        directions = []
+        here = start
+        while here != destination:
+            number = table[ids[here]]
+            if not number:
+                return None
+            direction = self.directions[number - 1]
+            directions.append(direction)
+            here = self.locations[here]["exits"][direction]
+        return directions
@@ -0,0 +1,241 @@
+""""
+Append-only command logs for sessions, with periodic snapshots.
+
+Sessions are seeded (see Adventure.turn_random()), so a session's commands
+are all that's needed to play it again exactly. SessionJournal appends each
+command to the session's log as it's played, and every snapshot_every turns
+writes a snapshot (see session_store.py) noting how far through the log it
+is. restore() loads the latest snapshot and plays only the commands logged
+after it, without rendering any output, so restoring a session after a
+crash takes about the same time however long the player has been playing.
+replay() plays a whole log from the start with output, e.g. to reproduce a
+bug report.
+
+Log format - integers are unsigned LEB128 varints:
+    b"OAL" magic, version byte, session seed
+    commands - each as byte length + UTF-8 bytes
+A journal snapshot is the log position it was taken at (varint), followed by
+dump_session() data.
+"""
+
+import os
+import time
+from collections import OrderedDict, deque
+
+from session_store import SnapshotError, dump_session, get_varint, load_session, put_varint
+
+MAGIC = b"OAL"
+VERSION = 1
+# Most bytes a log header (magic, version and seed) can take
+HEADER_SIZE = 64
+
+
+class SessionJournal(object):
+    """Command logs and snapshots for many sessions, in one directory
+    Args:
+        directory - directory for logs and snapshots (created if needed)
+        snapshot_every (int) - turns between snapshots. Restoring replays at
+                               most this many commands.
+        max_open (int) - number of log files kept open for appending
+    """
+    def __init__(self, directory, snapshot_every=100, max_open=256):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.max_open = max_open
+        os.makedirs(directory, exist_ok=True)
+        # Session ID -> log file open for appending, least recently used first
+        self.logs = OrderedDict()
+        self.snapshots = 0
+        # Number of logged commands played by restore()
+        self.replayed = 0
+        # Seconds taken by recent restores
+        self.restore_times = deque(maxlen=10000)
+
+    def path(self, session_id, extension):
+        """Return file name for session (IDs are hex-encoded for safety)"""
+        return os.path.join(self.directory, session_id.encode("utf-8").hex() + extension)
+
+    def __contains__(self, session_id):
+        return session_id in self.logs or os.path.exists(self.path(session_id, ".log"))
+
+    def log_file(self, session_id):
+        """Return session's log, open for appending"""
+        log = self.logs.get(session_id)
+        if log is not None:
+            self.logs.move_to_end(session_id)
+            return log
+        log = self.logs[session_id] = open(self.path(session_id, ".log"), "ab")
+        while len(self.logs) > self.max_open:
+            self.logs.popitem(last=False)[1].close()
+        return log
+
+    def begin(self, session_id, game):
+        """Start a new log for a session, before any commands are played
+        Args:
+            session_id - ID of session
+            game - the new Adventure session
+        """
+        self.remove(session_id)
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        put_varint(header, game.seed)
+        log = self.log_file(session_id)
+        log.write(header)
+        log.flush()
+
+    def record(self, session_id, game, command):
+        """Append a command to the session's log, once it has been played
+        Also snapshots the session every snapshot_every turns.
+        Args:
+            session_id - ID of session
+            game - the Adventure session, after playing the command
+            command - the line of input played
+        """
+        encoded = command.encode("utf-8")
+        data = bytearray()
+        put_varint(data, len(encoded))
+        data += encoded
+        log = self.log_file(session_id)
+        log.write(data)
+        # Flushed every time so nothing is lost if the process dies
+        log.flush()
+        if game.turn_count % self.snapshot_every == 0:
+            self.snapshot(session_id, game, log.tell())
+
+    def snapshot(self, session_id, game, position):
+        """Write snapshot of session, taken at position in its log"""
+        data = bytearray()
+        put_varint(data, position)
+        data += dump_session(game)
+        path = self.path(session_id, ".snap")
+        # Write to temporary file first so a crash can't leave half a snapshot
+        with open(path + ".tmp", "wb") as snapshot:
+            snapshot.write(data)
+        os.replace(path + ".tmp", path)
+        self.snapshots += 1
+
+    def read_log(self, session_id, position=None):
+        """Return (seed, position of first command in data, log data) for session
+        Args:
+            position - optional log position to read from, e.g. a snapshot's.
+                       By default the whole log is read.
+        """
+        log = self.logs.get(session_id)
+        if log is not None:
+            log.flush()
+        try:
+            with open(self.path(session_id, ".log"), "rb") as f:
+                header = f.read(HEADER_SIZE)
+                if position is None:
+                    f.seek(0)
+                else:
+                    f.seek(position)
+                data = f.read()
+        except FileNotFoundError:
+            raise KeyError("No such session: {}".format(session_id)) from None
+        if header[:3] != MAGIC or len(header) < 5:
+            raise SnapshotError("Not a session log")
+        if header[3] != VERSION:
+            raise SnapshotError("Unsupported log version: {}".format(header[3]))
+        try:
+            seed, pos = get_varint(header, 4)
+        except IndexError as e:
+            raise SnapshotError("Truncated session log") from e
+        return seed, (pos if position is None else 0), data
+
+    def commands(self, data, pos):
+        """Return commands in log data from pos onwards
+        A partly written last command (from a crash while writing it) is left out.
+        Returns:
+            (list of commands, position in data where the last complete one ends)
+        """
+        commands = []
+        end = len(data)
+        while pos < end:
+            try:
+                size, start = get_varint(data, pos)
+            except IndexError:
+                break
+            if start + size > end:
+                break
+            pos = start + size
+            commands.append(data[start:pos].decode("utf-8"))
+        return commands, pos
+
+    def restore(self, session_id, new_session):
+        """Rebuild a session from its latest snapshot and the commands logged after it
+        No output is rendered for the replayed commands.
+        Args:
+            session_id - ID of session
+            new_session - function returning a new Adventure session for the
+                          session's world
+        Returns:
+            the restored Adventure session
+        """
+        start = time.perf_counter()
+        # Only the log after the snapshot is read, so restoring doesn't take
+        # longer the longer the session's log gets
+        try:
+            with open(self.path(session_id, ".snap"), "rb") as f:
+                snapshot = f.read()
+        except FileNotFoundError:
+            snapshot = position = None
+        else:
+            try:
+                position, snapshot_start = get_varint(snapshot, 0)
+            except IndexError as e:
+                raise SnapshotError("Truncated journal snapshot") from e
+        seed, pos, data = self.read_log(session_id, position)
+        commands, end = self.commands(data, pos)
+        if end < len(data):
+            # Cut off the partly written command, or the next one logged
+            # would be read back with its bytes
+            self.release(session_id)
+            os.truncate(self.path(session_id, ".log"), (position or 0) + end)
+        game = new_session()
+        game.seed = seed
+        if snapshot is not None:
+            load_session(game, snapshot[snapshot_start:])
+        game.rendering = False
+        for command in commands:
+            game.step(command)
+            self.replayed += 1
+        game.rendering = True
+        self.restore_times.append(time.perf_counter() - start)
+        return game
+
+    def replay(self, session_id, new_session):
+        """Play a session's whole log again from the start, with output
+        Args:
+            session_id - ID of session
+            new_session - function returning a new Adventure session for the
+                          session's world
+        Returns:
+            generator of (command, output) - command is None for the opening text
+        """
+        seed, pos, data = self.read_log(session_id)
+        game = new_session()
+        game.seed = seed
+        yield None, game.start()
+        for command in self.commands(data, pos)[0]:
+            yield command, game.step(command)
+
+    def release(self, session_id):
+        """Close session's log file, e.g. when another process takes the session over"""
+        log = self.logs.pop(session_id, None)
+        if log is not None:
+            log.close()
+
+    def remove(self, session_id):
+        """Delete a session's log and snapshot"""
+        self.release(session_id)
+        for extension in (".log", ".snap"):
+            try:
+                os.remove(self.path(session_id, extension))
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        """Close all open log files"""
+        while self.logs:
+            self.logs.popitem()[1].close()
@@ -0,0 +1,307 @@
+""""
+Runs sessions across several worker processes, to use more than one core.
+
+SessionPool starts one worker process per core, each with its own
+SessionManager, and sends each session to a fixed worker chosen by a hash
+of its session ID. Every worker journals its sessions' commands (see
+session_log.py) to a shared directory, so:
+
+- a worker that crashes is restarted, and its sessions are restored from
+  their journals the next time they're played. Each worker counts the
+  turns of a batch it has played (and journaled) in shared memory, so only
+  the turns it never got to are reported as lost.
+- drain() moves all of a worker's sessions to the other workers, as
+  snapshots, before restarting it
+
+Turns are sent in batches with step_many(), so all the workers play their
+share of a batch at the same time. The pool records each worker's load
+and turn latency - see report().
+
+    pool = SessionPool("sessions")
+    print(pool.open("player1"))
+    print(pool.step("player1", "take pass"))
+    pool.close()
+"""
+
+import multiprocessing
+import os
+import time
+import zlib
+
+from adventure_data import intro_text
+from adventure_engine import Adventure
+from instrumentation import Histogram
+from session_log import SessionJournal
+from session_store import SessionManager
+
+# Output for turns lost in a worker crash
+LOST_TURN = "Sorry, something went wrong. Please try that again.\n"
+# Output for turns played before a worker crashed, but whose output was lost
+UNREPORTED_TURN = ("Sorry, something went wrong, but that was done. "
+                   "Type \"look\" to see where you are.\n")
+
+
+def new_default_session():
+    """Return a new session of the stock game"""
+    return Adventure(start_text=intro_text)
+
+
+def worker_main(connection, snapshot_dir, journal_dir, new_session, max_hot, snapshot_every,
+                progress):
+    """Worker process - plays turns for its sessions until told to stop
+    Requests received on connection, each answered with one reply:
+        ("turns", [(session_id, command), ...]) - command None opens the session.
+            Replies with [(output, keep_going, seconds), ...]. Output is None
+            for an unknown session. progress (a shared integer) is set to
+            the number of turns played so far, each after it's journaled.
+        ("export",) - replies with [(session_id, snapshot), ...] for every
+            session, which the worker then forgets
+        ("adopt", [(session_id, snapshot), ...]) - take over exported sessions
+        ("stats",) - replies with dictionary of counts
+        ("stop",) - write sessions to disk and exit
+    """
+    journal = SessionJournal(journal_dir, snapshot_every)
+    manager = SessionManager(snapshot_dir, new_session, max_hot, journal=journal)
+    clock = time.perf_counter
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break
+        kind = request[0]
+        if kind == "turns":
+            results = []
+            progress.value = 0
+            for session_id, command in request[1]:
+                start = clock()
+                try:
+                    if command is None:
+                        output = manager.open(session_id)
+                        keep_going = True
+                    else:
+                        output = manager.step(session_id, command)
+                        keep_going = session_id in manager.hot
+                except KeyError:
+                    output, keep_going = None, False
+                results.append((output, keep_going, clock() - start))
+                progress.value = len(results)
+            connection.send(results)
+        elif kind == "export":
+            connection.send([(session_id, manager.export(session_id))
+                             for session_id in manager.session_ids()])
+        elif kind == "adopt":
+            for session_id, snapshot in request[1]:
+                manager.adopt(session_id, snapshot)
+            connection.send(None)
+        elif kind == "stats":
+            connection.send({"sessions": len(manager.hot),
+                             "evictions": manager.evictions,
+                             "restores": len(journal.restore_times),
+                             "replayed": journal.replayed})
+        elif kind == "stop":
+            manager.evict_all()
+            journal.close()
+            connection.send(None)
+            break
+
+
+class Worker(object):
+    """Supervisor's record of one worker process
+    Args:
+        number (int) - worker's position in the pool
+    """
+    def __init__(self, number):
+        self.number = number
+        self.process = None
+        self.connection = None
+        # Turns of the current batch the worker has played
+        self.progress = multiprocessing.RawValue("i", 0)
+        # Turn latency in microseconds, as measured by the worker
+        self.latency = Histogram(scale=16)
+        self.turns = 0
+        self.restarts = 0
+
+
+class SessionPool(object):
+    """Plays sessions in a pool of worker processes
+    Args:
+        directory - directory for session journals and evicted sessions
+        workers (int) - number of worker processes (default one per core)
+        new_session - function returning a new Adventure session. Must be
+                      picklable (e.g. a module-level function).
+        max_hot (int) - sessions each worker keeps in memory
+        snapshot_every (int) - turns between journal snapshots
+    """
+    def __init__(self, directory, workers=None, new_session=new_default_session, max_hot=1000,
+                 snapshot_every=100):
+        self.directory = directory
+        self.new_session = new_session
+        self.max_hot = max_hot
+        self.snapshot_every = snapshot_every
+        self.journal_dir = os.path.join(directory, "journal")
+        self.workers = [Worker(n) for n in range(workers or os.cpu_count() or 1)]
+        # Session ID -> worker number, for sessions moved off their usual
+        # worker by drain()
+        self.moved = {}
+        for worker in self.workers:
+            self.start_worker(worker)
+
+    def start_worker(self, worker):
+        """Start (or restart) a worker's process"""
+        connection, child = multiprocessing.Pipe()
+        worker.progress.value = 0
+        snapshot_dir = os.path.join(self.directory, "worker{}".format(worker.number))
+        worker.process = multiprocessing.Process(
+            target=worker_main, daemon=True,
+            args=(child, snapshot_dir, self.journal_dir, self.new_session, self.max_hot,
+                  self.snapshot_every, worker.progress))
+        worker.process.start()
+        child.close()
+        worker.connection = connection
+
+    def restart(self, worker):
+        """Replace a worker's process, e.g. after it crashed"""
+        worker.connection.close()
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join()
+        worker.restarts += 1
+        self.start_worker(worker)
+
+    def worker_for(self, session_id):
+        """Return Worker that plays session"""
+        number = self.moved.get(session_id)
+        if number is None:
+            number = zlib.crc32(session_id.encode("utf-8")) % len(self.workers)
+        return self.workers[number]
+
+    def request(self, worker, request):
+        """Send request to worker and return its reply
+        Raises:
+            ConnectionError if the worker died - it is restarted first
+        """
+        try:
+            worker.connection.send(request)
+            return worker.connection.recv()
+        except (EOFError, OSError):
+            self.restart(worker)
+            raise ConnectionError("Worker {} died".format(worker.number)) from None
+
+    def step_many(self, turns):
+        """Play a batch of turns, each worker playing its share at the same time
+        Turns for the same session are played in order.
+        Args:
+            turns - list of (session ID, command). Command None opens a new session.
+        Returns:
+            list of output for each turn, in the same order. Output is None for
+            unknown sessions. When a worker crashes, it's LOST_TURN for the
+            turns it hadn't played and UNREPORTED_TURN for those it had.
+        """
+        batches = {}
+        for n, (session_id, command) in enumerate(turns):
+            batches.setdefault(self.worker_for(session_id).number, []).append(n)
+        # Send every batch before waiting for any replies
+        sent = []
+        for number, positions in batches.items():
+            worker = self.workers[number]
+            try:
+                worker.connection.send(("turns", [turns[n] for n in positions]))
+                sent.append((worker, positions))
+            except OSError:
+                self.restart(worker)
+        outputs = [LOST_TURN] * len(turns)
+        for worker, positions in sent:
+            try:
+                results = worker.connection.recv()
+            except (EOFError, OSError):
+                # Turns played before the crash were journaled, so they
+                # mustn't be played again
+                for n in positions[:worker.progress.value]:
+                    outputs[n] = UNREPORTED_TURN
+                self.restart(worker)
+                continue
+            for n, (output, keep_going, seconds) in zip(positions, results):
+                outputs[n] = output
+                worker.latency.record(seconds * 1e6)
+                if not keep_going:
+                    self.moved.pop(turns[n][0], None)
+            worker.turns += len(results)
+        return outputs
+
+    def open(self, session_id):
+        """Start a new session
+        Returns:
+            intro text for the session
+        """
+        return self.step_many([(session_id, None)])[0]
+
+    def step(self, session_id, command):
+        """Play one command in a session
+        Returns:
+            output for the turn (None if there's no such session)
+        """
+        return self.step_many([(session_id, command)])[0]
+
+    def drain(self, number):
+        """Move all of a worker's sessions to the other workers, then restart it
+        Sessions moved stay on their new workers until they finish.
+        Args:
+            number (int) - worker's position in the pool
+        """
+        others = [worker for worker in self.workers if worker.number != number]
+        if not others:
+            raise ValueError("Can't drain the only worker")
+        draining = self.workers[number]
+        sessions = self.request(draining, ("export",))
+        moves = {}
+        for session_id, snapshot in sessions:
+            target = others[zlib.crc32(session_id.encode("utf-8")) % len(others)]
+            moves.setdefault(target.number, []).append((session_id, snapshot))
+        for target, adopted in moves.items():
+            self.request(self.workers[target], ("adopt", adopted))
+            for session_id, _ in adopted:
+                self.moved[session_id] = target
+        self.stop_worker(draining)
+        draining.restarts += 1
+        self.start_worker(draining)
+
+    def stop_worker(self, worker):
+        """Stop a worker, letting it write its sessions to disk"""
+        try:
+            self.request(worker, ("stop",))
+        except ConnectionError:
+            pass
+        worker.process.join()
+        worker.connection.close()
+
+    def stats(self):
+        """Return list of per-worker dictionaries of load and turn latency (microseconds)"""
+        results = []
+        for worker in self.workers:
+            try:
+                counts = self.request(worker, ("stats",))
+            except ConnectionError:
+                counts = {}
+            latency = worker.latency
+            results.append(dict(counts, worker=worker.number, pid=worker.process.pid,
+                                turns=worker.turns, restarts=worker.restarts,
+                                mean=latency.mean(), p50=latency.percentile(0.5),
+                                p99=latency.percentile(0.99), max=latency.max))
+        return results
+
+    def report(self):
+        """Return text table of per-worker load and turn latency (microseconds)
+        Percentiles are bucket upper bounds, so accurate to within 1/8 (12.5%).
+        """
+        lines = ["{:<7} {:>8} {:>9} {:>10} {:>9} {:>9} {:>9} {:>10}".format(
+            "worker", "sessions", "turns", "restarts", "mean", "p50", "p99", "max")]
+        for stats in self.stats():
+            lines.append("{:<7} {:>8} {:>9} {:>10} {:>9.1f} {:>9.1f} {:>9.1f} {:>10.1f}".format(
+                stats["worker"], stats.get("sessions", "-"), stats["turns"], stats["restarts"],
+                stats["mean"], stats["p50"], stats["p99"], stats["max"]))
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        """Stop all workers, writing their sessions to disk"""
+        for worker in self.workers:
+            self.stop_worker(worker)
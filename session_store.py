@@ -0,0 +1,302 @@
+""""
+Session snapshots and a session manager that keeps idle sessions on disk.
+
+A snapshot holds only what a session has changed: its location, inventory,
+move count, random seed and turn count, and the things lists and container
+contents it has changed (see WorldState). Everything else is rebuilt from
+the shared world data when the session is loaded.
+
+Snapshot format (version 3), integers are unsigned LEB128 varints:
+    b"OAS" magic, version byte, flags byte (bit 0 - waiting for quit confirmation)
+    move count
+    seed, turn count
+    string table - count, then each string as byte length + UTF-8 bytes
+    location - string table index
+    inventory - count, then string table indices
+    changed locations - count, then for each: location index, item count, item indices
+    changed containers - as changed locations, with container item index
+Version 2 is the same without seed and turn count, version 1 also without
+changed containers.
+"""
+
+import os
+import time
+from collections import OrderedDict, deque
+
+MAGIC = b"OAS"
+VERSION = 3
+
+# Flag bits
+CONFIRMING_QUIT = 1
+
+
+class SnapshotError(ValueError):
+    """Snapshot data is not valid"""
+
+
+def dump_session(game):
+    """Return compact binary snapshot of a session's state
+    Args:
+        game - Adventure session
+    """
+    strings = {}
+
+    def ref(text):
+        """Return string table index for text, adding it if needed"""
+        return strings.setdefault(text, len(strings))
+
+    body = bytearray()
+    put_varint(body, ref(game.location_key))
+    put_varint(body, len(game.inventory))
+    for item in game.inventory:
+        put_varint(body, ref(item))
+    for changed in (game.world.changed_things, game.world.changed_contents):
+        put_varint(body, len(changed))
+        for key, things in changed.items():
+            put_varint(body, ref(key))
+            put_varint(body, len(things))
+            for item in things:
+                put_varint(body, ref(item))
+
+    data = bytearray(MAGIC)
+    data.append(VERSION)
+    data.append(CONFIRMING_QUIT if game.confirming_quit else 0)
+    put_varint(data, game.move_count)
+    put_varint(data, game.seed)
+    put_varint(data, game.turn_count)
+    put_varint(data, len(strings))
+    for text in strings:
+        encoded = text.encode("utf-8")
+        put_varint(data, len(encoded))
+        data += encoded
+    return bytes(data + body)
+
+
+def load_session(game, data):
+    """Restore a snapshot into a newly created session
+    Args:
+        game - new Adventure session for the same world
+        data - bytes from dump_session()
+    """
+    if data[:3] != MAGIC:
+        raise SnapshotError("Not a session snapshot")
+    version = data[3]
+    if version not in (1, 2, VERSION):
+        raise SnapshotError("Unsupported snapshot version: {}".format(data[3]))
+    flags = data[4]
+    pos = 5
+    try:
+        move_count, pos = get_varint(data, pos)
+        seed = turn_count = None
+        if version >= 3:
+            seed, pos = get_varint(data, pos)
+            turn_count, pos = get_varint(data, pos)
+        count, pos = get_varint(data, pos)
+        strings = []
+        for _ in range(count):
+            size, pos = get_varint(data, pos)
+            strings.append(data[pos:pos + size].decode("utf-8"))
+            pos += size
+
+        def get_string(pos):
+            index, pos = get_varint(data, pos)
+            return strings[index], pos
+
+        location_key, pos = get_string(pos)
+        count, pos = get_varint(data, pos)
+        inventory = []
+        for _ in range(count):
+            item, pos = get_string(pos)
+            inventory.append(item)
+
+        def get_changed(pos):
+            count, pos = get_varint(data, pos)
+            changed = {}
+            for _ in range(count):
+                key, pos = get_string(pos)
+                item_count, pos = get_varint(data, pos)
+                things = changed[key] = []
+                for _ in range(item_count):
+                    item, pos = get_string(pos)
+                    things.append(item)
+            return changed, pos
+
+        changed, pos = get_changed(pos)
+        contents = {}
+        if version >= 2:
+            contents, pos = get_changed(pos)
+    except (IndexError, UnicodeDecodeError) as e:
+        raise SnapshotError("Truncated or corrupt snapshot") from e
+
+    game.location_key = location_key
+    game.inventory.replace(inventory)
+    game.move_count = move_count
+    if seed is not None:
+        game.seed = seed
+        game.turn_count = turn_count
+    for key, things in changed.items():
+        game.world.mutable_things(key).replace(things)
+    for key, things in contents.items():
+        game.world.mutable_contents(key).replace(things)
+    if flags & CONFIRMING_QUIT:
+        game.v_quit("")
+
+
+def put_varint(data, value):
+    """Append unsigned LEB128 encoding of value to bytearray"""
+    while value > 0x7f:
+        data.append((value & 0x7f) | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+def get_varint(data, pos):
+    """Read unsigned LEB128 value from data at pos
+    Returns:
+        (value, position after it)
+    """
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class SessionManager(object):
+    """Keeps the most recently used sessions in memory and the rest on disk
+    Args:
+        snapshot_dir - directory for snapshots of evicted sessions
+        new_session - function returning a new Adventure session
+        max_hot (int) - number of sessions kept in memory
+        journal - optional SessionJournal (session_log.py) logging every
+                  command, so sessions survive the process dying. Sessions
+                  that are neither in memory nor evicted are restored from it.
+    """
+    def __init__(self, snapshot_dir, new_session, max_hot=1000, journal=None):
+        self.snapshot_dir = snapshot_dir
+        self.new_session = new_session
+        self.max_hot = max_hot
+        self.journal = journal
+        os.makedirs(snapshot_dir, exist_ok=True)
+        # Session ID -> Adventure, least recently used first
+        self.hot = OrderedDict()
+        self.evictions = 0
+        # Seconds taken by recent rehydrations
+        self.rehydrate_times = deque(maxlen=10000)
+
+    def snapshot_path(self, session_id):
+        """Return snapshot file name for session (IDs are hex-encoded for safety)"""
+        return os.path.join(self.snapshot_dir, session_id.encode("utf-8").hex() + ".snap")
+
+    def __contains__(self, session_id):
+        return (session_id in self.hot or os.path.exists(self.snapshot_path(session_id))
+                or (self.journal is not None and session_id in self.journal))
+
+    def open(self, session_id):
+        """Start a new session
+        Returns:
+            intro text for the session
+        """
+        if session_id in self:
+            raise KeyError("Session already exists: {}".format(session_id))
+        game = self.new_session()
+        if self.journal is not None:
+            self.journal.begin(session_id, game)
+        self.add(session_id, game)
+        return game.start()
+
+    def get(self, session_id):
+        """Return session, loading it from disk if it was evicted"""
+        game = self.hot.get(session_id)
+        if game is not None:
+            self.hot.move_to_end(session_id)
+            return game
+        path = self.snapshot_path(session_id)
+        try:
+            with open(path, "rb") as snapshot:
+                data = snapshot.read()
+        except FileNotFoundError:
+            if self.journal is None:
+                raise KeyError("No such session: {}".format(session_id)) from None
+            # Lost without being evicted, e.g. the process running it crashed
+            game = self.journal.restore(session_id, self.new_session)
+            self.add(session_id, game)
+            return game
+        start = time.perf_counter()
+        game = self.new_session()
+        load_session(game, data)
+        self.rehydrate_times.append(time.perf_counter() - start)
+        os.remove(path)
+        self.add(session_id, game)
+        return game
+
+    def step(self, session_id, command):
+        """Play one command in a session
+        Returns:
+            output for the turn
+        """
+        game = self.get(session_id)
+        output = game.step(command)
+        if self.journal is not None:
+            self.journal.record(session_id, game, command)
+        if not game.keep_going:
+            self.close(session_id)
+        return output
+
+    def add(self, session_id, game):
+        """Keep session in memory, evicting least recently used if over max_hot"""
+        self.hot[session_id] = game
+        while len(self.hot) > self.max_hot:
+            self.evict(next(iter(self.hot)))
+
+    def evict(self, session_id):
+        """Write session to disk and drop it from memory"""
+        game = self.hot.pop(session_id)
+        path = self.snapshot_path(session_id)
+        # Write to temporary file first so a crash can't leave half a snapshot
+        with open(path + ".tmp", "wb") as snapshot:
+            snapshot.write(dump_session(game))
+        os.replace(path + ".tmp", path)
+        self.evictions += 1
+
+    def evict_all(self):
+        """Write every in-memory session to disk, e.g. before shutting down"""
+        while self.hot:
+            self.evict(next(iter(self.hot)))
+
+    def session_ids(self):
+        """Return IDs of every session, in memory or evicted (not those only in the journal)"""
+        ids = list(self.hot)
+        for name in os.listdir(self.snapshot_dir):
+            if name.endswith(".snap"):
+                ids.append(bytes.fromhex(name[:-5]).decode("utf-8"))
+        return ids
+
+    def export(self, session_id):
+        """Return snapshot of a session and forget it, e.g. to move it to another process
+        Its journal, if there is one, is kept for the session's new home.
+        """
+        game = self.get(session_id)
+        del self.hot[session_id]
+        if self.journal is not None:
+            self.journal.release(session_id)
+        return dump_session(game)
+
+    def adopt(self, session_id, data):
+        """Take over a session exported from another SessionManager"""
+        game = self.new_session()
+        load_session(game, data)
+        self.add(session_id, game)
+
+    def close(self, session_id):
+        """Forget a finished session"""
+        self.hot.pop(session_id, None)
+        if self.journal is not None:
+            self.journal.remove(session_id)
+        try:
+            os.remove(self.snapshot_path(session_id))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,242 @@
+""""
+Structured telemetry of game turns, written as JSON lines.
+
+TurnTelemetry records one JSON object per turn - session, input, the verb
+and noun each command resolved to, location before and after, moves made,
+item event rules evaluated and fired, output size and latency - and hands
+it to a TelemetryWriter. Like Instrumentation, it works by wrapping a
+session's own methods, so sessions it isn't attached to pay nothing.
+
+The game loop never waits for the disk: TelemetryWriter puts records on a
+bounded queue, and a background thread turns them into JSON and writes them
+in batches, starting a new file once the current one is too big. When the
+queue is full, records are dropped and counted (policy "drop", the
+default) or the game waits for room (policy "block").
+
+    writer = TelemetryWriter("turns.jsonl")
+    telemetry = TurnTelemetry(writer)
+    telemetry.attach(game, "player1")
+    ...
+    writer.close()
+    print(writer.stats())
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class TelemetryWriter(object):
+    """Writes records as JSON lines from a background thread
+    Args:
+        path - file to write. Older files are kept as path.1, path.2... (newest first)
+        max_queue (int) - records held in memory waiting to be written
+        batch_size (int) - most records written at once. The writer thread
+                           is woken as soon as this many are waiting.
+        flush_interval (float) - seconds a record can wait for a batch to fill
+        max_bytes (int) - size at which a new file is started (0 to never start one)
+        backups (int) - number of older files kept
+        policy - "drop" to drop records when the queue is full, "block" to wait for room
+        block_timeout (float) - with policy "block", seconds to wait before
+                                dropping the record anyway (None waits for ever)
+    """
+    def __init__(self, path, max_queue=10000, batch_size=256, flush_interval=0.5,
+                 max_bytes=64 * 1024 * 1024, backups=5, policy="drop", block_timeout=None):
+        if policy not in ("drop", "block"):
+            raise ValueError("Unknown queue full policy: {}".format(policy))
+        self.path = path
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.policy = policy
+        self.block_timeout = block_timeout
+        # Records waiting to be written. Appending to a deque needs no lock,
+        # so emit() costs the game loop next to nothing.
+        self.queue = deque()
+        # Set to wake the writer thread early
+        self.ready = threading.Event()
+        self.stopping = False
+        self.emitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.rotations = 0
+        self.write_errors = 0
+        self.file = open(path, "a", encoding="utf-8")
+        self.thread = threading.Thread(target=self.run, name="telemetry writer", daemon=True)
+        self.thread.start()
+
+    def emit(self, record):
+        """Queue record (a JSON-serialisable dictionary) for writing
+        Don't change the record afterwards - it's turned into JSON later.
+        Returns:
+            False if the record was dropped
+        """
+        waiting = self.queue
+        if len(waiting) >= self.max_queue and not self.wait_for_room():
+            self.dropped += 1
+            return False
+        waiting.append(record)
+        self.emitted += 1
+        if len(waiting) == self.batch_size:
+            self.ready.set()
+        return True
+
+    def wait_for_room(self):
+        """With policy "block", wait for the queue to have room
+        Returns:
+            True if there's room
+        """
+        if self.policy == "drop":
+            return False
+        self.ready.set()
+        deadline = None if self.block_timeout is None else time.monotonic() + self.block_timeout
+        while len(self.queue) >= self.max_queue:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def run(self):
+        """Writer thread - writes batches of records until close() is called"""
+        waiting = self.queue
+        while True:
+            self.ready.wait(self.flush_interval)
+            self.ready.clear()
+            stopping = self.stopping
+            while waiting:
+                batch = [waiting.popleft() for _ in range(min(self.batch_size, len(waiting)))]
+                self.write(batch)
+            if stopping:
+                return
+
+    def write(self, batch):
+        """Write a batch of records, starting a new file first if needed"""
+        text = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch)
+        try:
+            size = self.file.tell()
+            if self.max_bytes and size and size + len(text) > self.max_bytes:
+                self.rotate()
+            self.file.write(text)
+            self.file.flush()
+        except OSError:
+            self.write_errors += 1
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def rotate(self):
+        """Move current file to path.1 (and older ones up one) and start a new one"""
+        self.file.close()
+        for n in range(self.backups - 1, 0, -1):
+            older = "{}.{}".format(self.path, n)
+            if os.path.exists(older):
+                os.replace(older, "{}.{}".format(self.path, n + 1))
+        if self.backups:
+            os.replace(self.path, self.path + ".1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.rotations += 1
+
+    def stats(self):
+        """Return dictionary of record counts"""
+        return {"emitted": self.emitted, "dropped": self.dropped, "written": self.written,
+                "queued": len(self.queue), "batches": self.batches,
+                "rotations": self.rotations, "write_errors": self.write_errors}
+
+    def close(self):
+        """Write everything queued, then stop the writer thread and close the file"""
+        self.stopping = True
+        self.ready.set()
+        self.thread.join()
+        self.file.close()
+
+
+class TurnTelemetry(object):
+    """Records a JSON object per turn for attached sessions
+    Args:
+        writer - TelemetryWriter (or anything with an emit(record) method)
+    """
+    def __init__(self, writer):
+        self.writer = writer
+
+    def attach(self, game, session_id):
+        """Start recording a session's turns
+        Wraps step, parse, move, item_events_check and the verb handlers. To
+        use with Instrumentation too, attach that first.
+        Args:
+            game - Adventure session
+            session_id - identifies the session in the records
+        """
+        emit = self.writer.emit
+        clock = time.perf_counter
+        tracker = game.event_tracker
+        # Per-turn details, filled in by the wrappers below
+        commands = []
+        moves = []
+        rules = [0, 0]
+
+        step = game.step
+
+        def timed_step(command):
+            before = game.location_key
+            commands.clear()
+            moves.clear()
+            rules[0] = rules[1] = 0
+            start = clock()
+            output = step(command)
+            latency = clock() - start
+            emit({"time": time.time(), "session": session_id, "turn": game.turn_count,
+                  "input": command, "commands": list(commands),
+                  "location_before": before, "location_after": game.location_key,
+                  "moves": list(moves), "rules_evaluated": rules[0], "rules_fired": rules[1],
+                  "output_bytes": len(output.encode("utf-8")),
+                  "latency_us": round(latency * 1e6, 1)})
+            return output
+        game.step = timed_step
+
+        parse = game.parse
+
+        def recorded_parse():
+            count = len(commands)
+            parse()
+            # No verb handler ran - unknown verb, or ambiguous abbreviation
+            if len(commands) == count:
+                commands.append([None, " ".join(game.current_input).strip()])
+        game.parse = recorded_parse
+
+        def recorded_verb(name, fn):
+            def verb(game, noun):
+                commands.append([name, noun])
+                return fn(game, noun)
+            return verb
+        game.verbs = {name: recorded_verb(name, fn) for name, fn in game.verbs.items()}
+
+        move = game.move
+
+        def recorded_move(direction):
+            before = game.location_key
+            moved = move(direction)
+            moves.append([direction, before, game.location_key if moved else None])
+            return moved
+        game.move = recorded_move
+
+        check = game.item_events_check
+
+        def recorded_check():
+            check()
+            rules[0] += tracker.evaluated
+            rules[1] += tracker.fired
+        game.item_events_check = recorded_check
+
+    def detach(self, game):
+        """Stop recording a session's turns, restoring its class's own methods
+        (which also undoes Instrumentation's wrappers of the same methods)
+        """
+        for name in ("step", "parse", "verbs", "move", "item_events_check"):
+            game.__dict__.pop(name, None)
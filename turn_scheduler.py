@@ -0,0 +1,288 @@
+""""
+Fair scheduling of turns for sessions sharing one asyncio event loop.
+
+Without it, each line a client sends is played as soon as it's read, so one
+client pasting hundreds of commands keeps the loop busy until all of them
+are done, and every other session waits. TurnScheduler sits between reading
+input and playing it:
+
+- each session has a bounded queue of input lines. When it's full, submit()
+  waits for room (policy "block" - the client's connection stops being read,
+  so TCP pushes back on the client) or drops the line (policy "drop").
+- sessions with input are served round-robin, each playing up to its
+  weight in turns per round
+- each session has a turns-per-second budget (a token bucket, so short
+  bursts are allowed). A session over budget sits out until it has a turn
+  again, without holding up anyone else.
+
+The scheduler records queue depths and how long lines wait to be played -
+see stats() and report().
+
+    scheduler = TurnScheduler(turns_per_second=10)
+    asyncio.ensure_future(scheduler.run())
+    scheduler.register("player1", game, deliver)
+    await scheduler.submit("player1", "take pass")  # output goes to deliver()
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+
+from instrumentation import Histogram
+
+
+class SessionQueue(object):
+    """Queued input and turn budget of one session
+    Args:
+        session_id - identifies the session
+        game - Adventure session to play the input in
+        deliver - function called with the output of each turn
+        weight (int) - turns played per round when others are waiting too
+        tokens (float) - turns that can be played straight away
+    """
+    def __init__(self, session_id, game, deliver, weight, tokens):
+        self.session_id = session_id
+        self.game = game
+        self.deliver = deliver
+        self.weight = weight
+        # Lines waiting to be played, as (line, time queued)
+        self.lines = deque()
+        # Set when there's room in the queue (or the session has finished)
+        self.room = asyncio.Event()
+        self.room.set()
+        self.tokens = tokens
+        self.refilled = time.monotonic()
+        # True while waiting in the scheduler's ready or throttled queues
+        self.scheduled = False
+        self.closed = False
+        self.turns = 0
+        self.dropped = 0
+        self.throttled = 0
+
+
+class TurnScheduler(object):
+    """Plays sessions' input fairly, with per-session queues and budgets
+    Args:
+        turns_per_second (float) - each session's budget (0 for no limit)
+        burst (int) - turns a session can play at once before its budget
+                      applies (defaults to turns_per_second, at least 1)
+        max_queue (int) - lines each session can have waiting
+        policy - "block" to make submit() wait for room in a full queue,
+                 "drop" to drop the line
+        yield_every (int) - turns played before letting the event loop read
+                            and write sockets
+    """
+    def __init__(self, turns_per_second=10, burst=None, max_queue=32, policy="block",
+                 yield_every=16):
+        if policy not in ("drop", "block"):
+            raise ValueError("Unknown queue full policy: {}".format(policy))
+        self.turns_per_second = turns_per_second
+        if burst is None:
+            burst = max(1, int(turns_per_second))
+        self.burst = burst
+        self.max_queue = max_queue
+        self.policy = policy
+        self.yield_every = yield_every
+        # Session ID -> SessionQueue
+        self.sessions = {}
+        # Sessions with input and budget to play it, in round-robin order
+        self.ready = deque()
+        # Heap of (time, count, session) for sessions with input but no
+        # budget left, by when they'll have a turn again
+        self.throttled = []
+        self.counter = itertools.count()
+        # Set to wake run() when there's new input
+        self.work = asyncio.Event()
+        self.stopping = False
+        self.turns = 0
+        self.dropped = 0
+        # Time lines wait between submit() and being played (microseconds)
+        self.wait = Histogram()
+        # Depth of a session's queue whenever a line is added to it
+        self.depth = Histogram()
+
+    def register(self, session_id, game, deliver, weight=1):
+        """Start scheduling a session
+        Args:
+            session_id - identifies the session to submit()
+            game - Adventure session to play its input in
+            deliver - function called with the output of each turn, as
+                      returned by game.step()
+            weight (int) - turns played per round, for sessions that should
+                           get more than their share
+        """
+        self.sessions[session_id] = SessionQueue(session_id, game, deliver, weight, self.burst)
+
+    def unregister(self, session_id):
+        """Stop scheduling a session, dropping any input still queued"""
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self.finish(session)
+
+    def finish(self, session):
+        """Mark a session finished, waking anything waiting to submit to it"""
+        session.closed = True
+        session.lines.clear()
+        session.room.set()
+
+    def queue_depth(self, session_id):
+        """Return number of lines a session has waiting"""
+        return len(self.sessions[session_id].lines)
+
+    async def submit(self, session_id, line):
+        """Queue a line of input to be played in a session
+        With policy "block", waits while the session's queue is full.
+        Returns:
+            False if the line was dropped - the queue was full with policy
+            "drop", or the session has finished
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
+        while len(session.lines) >= self.max_queue and not session.closed:
+            if self.policy == "drop":
+                session.dropped += 1
+                self.dropped += 1
+                return False
+            session.room.clear()
+            await session.room.wait()
+        if session.closed:
+            return False
+        now = time.monotonic()
+        session.lines.append((line, now))
+        self.depth.record(len(session.lines))
+        if not session.scheduled:
+            self.refill(session, now)
+            if not self.ready and (not self.turns_per_second or session.tokens >= 1):
+                # No one else is waiting, so play it now rather than waiting
+                # for run() to get a turn of the event loop
+                self.play(session, now)
+            else:
+                self.schedule(session, now)
+                self.work.set()
+        return True
+
+    def refill(self, session, now):
+        """Add the budget a session has earned since it was last refilled"""
+        if self.turns_per_second:
+            session.tokens = min(self.burst, session.tokens
+                                 + (now - session.refilled) * self.turns_per_second)
+        session.refilled = now
+
+    def schedule(self, session, now):
+        """Put a session with input in the ready queue, or the throttled
+        queue if it's over budget
+        """
+        session.scheduled = True
+        self.refill(session, now)
+        if not self.turns_per_second or session.tokens >= 1:
+            self.ready.append(session)
+        else:
+            session.throttled += 1
+            due = now + (1 - session.tokens) / self.turns_per_second
+            heapq.heappush(self.throttled, (due, next(self.counter), session))
+
+    def play(self, session, now):
+        """Play the first line in a session's queue and deliver the output"""
+        line, queued = session.lines.popleft()
+        self.wait.record((now - queued) * 1e6)
+        if len(session.lines) < self.max_queue:
+            session.room.set()
+        if self.turns_per_second:
+            session.tokens -= 1
+        session.turns += 1
+        self.turns += 1
+        session.deliver(session.game.step(line))
+        if not session.game.keep_going:
+            self.finish(session)
+
+    def play_round(self, session):
+        """Play up to a session's weight in turns, then reschedule it
+        Returns:
+            number of turns played
+        """
+        played = 0
+        now = time.monotonic()
+        while played < session.weight and session.lines:
+            if self.turns_per_second and session.tokens < 1:
+                break
+            self.play(session, now)
+            played += 1
+        session.scheduled = False
+        if session.lines and not session.closed:
+            self.schedule(session, time.monotonic())
+        return played
+
+    async def run(self):
+        """Play queued input until stop() is called"""
+        played = 0
+        while not self.stopping:
+            now = time.monotonic()
+            throttled = self.throttled
+            while throttled and throttled[0][0] <= now:
+                session = heapq.heappop(throttled)[2]
+                self.refill(session, now)
+                self.ready.append(session)
+            if not self.ready:
+                # Nothing to play until new input arrives or a throttled
+                # session has budget again
+                self.work.clear()
+                if not throttled:
+                    await self.work.wait()
+                else:
+                    try:
+                        await asyncio.wait_for(self.work.wait(), throttled[0][0] - now)
+                    except asyncio.TimeoutError:
+                        pass
+                played = 0
+                continue
+            session = self.ready.popleft()
+            if session.closed:
+                continue
+            played += self.play_round(session)
+            if played >= self.yield_every:
+                played = 0
+                await asyncio.sleep(0)
+
+    def stop(self):
+        """Make run() return, and stop every session waiting to submit"""
+        self.stopping = True
+        self.work.set()
+        for session in self.sessions.values():
+            self.finish(session)
+
+    def stats(self):
+        """Return dictionary of turn counts, queue depths and waits (microseconds)"""
+        return {"sessions": len(self.sessions), "turns": self.turns, "dropped": self.dropped,
+                "queued": sum(len(session.lines) for session in self.sessions.values()),
+                "ready": len(self.ready), "throttled": len(self.throttled),
+                "depth_p50": self.depth.percentile(0.5), "depth_p99": self.depth.percentile(0.99),
+                "depth_max": self.depth.max, "wait_mean": self.wait.mean(),
+                "wait_p50": self.wait.percentile(0.5), "wait_p99": self.wait.percentile(0.99),
+                "wait_max": self.wait.max}
+
+    def report(self, top=10):
+        """Return text report of queue depths and waits, with the sessions
+        that have most input waiting
+        Percentiles are bucket upper bounds, so accurate to within 1/8 (12.5%).
+        """
+        stats = self.stats()
+        lines = ["Sessions: {sessions}  Turns: {turns}  Dropped: {dropped}  Queued: {queued}  "
+                 "Ready: {ready}  Throttled: {throttled}".format(**stats),
+                 "Queue depth p50: {depth_p50:.0f}  p99: {depth_p99:.0f}  "
+                 "max: {depth_max}".format(**stats),
+                 "Wait us mean: {wait_mean:.1f}  p50: {wait_p50:.1f}  p99: {wait_p99:.1f}  "
+                 "max: {wait_max:.1f}".format(**stats)]
+        busiest = sorted(self.sessions.values(), key=lambda session: len(session.lines),
+                         reverse=True)[:top]
+        busiest = [session for session in busiest if session.lines]
+        if busiest:
+            lines.append("{:<20} {:>7} {:>9} {:>9} {:>10}".format(
+                "session", "queued", "turns", "dropped", "throttled"))
+            for session in busiest:
+                lines.append("{:<20} {:>7} {:>9} {:>9} {:>10}".format(
+                    str(session.session_id), len(session.lines), session.turns,
+                    session.dropped, session.throttled))
+        return "\n".join(lines) + "\n"
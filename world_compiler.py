@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+""""
+World compiler - checks a world's data up front and builds runtime structures.
+
+A world is the locations, items and item_events data from a module like
+adventure_data.py. compile_world() checks that every reference in it is
+valid (exits, items, events), so mistakes show up before anyone plays
+rather than as "GAME ERROR" mid-game, then builds Item and Location objects
+with interned integer IDs. load_world() does the same for a data module on
+disk, keeping the compiled form in a cache file that is rebuilt only when
+the module's source changes.
+
+Usage: python world_compiler.py [data_module.py] - report problems in a world
+"""
+
+import hashlib
+import importlib.util
+import os
+import pickle
+import sys
+
+from item_rules import ItemEventIndex
+from render_cache import RenderCache
+from room_graph import RoomGraph
+from world_state import BaseThings, WorldState
+
+# Bump when compiled structures change, so old cache files aren't used
+COMPILER_VERSION = 3
+
+# Valid keys of an event's "needs" and outcome dictionaries
+NEEDS_KEYS = ("player_needs", "location_needs", "location_not_needs")
+OUTCOME_KEYS = ("message", "new_location", "remove_location_items")
+
+
+class WorldError(ValueError):
+    """World data contains invalid references
+    Args:
+        problems - list of problem descriptions
+    """
+    def __init__(self, problems):
+        super().__init__("Invalid world:\n" + "\n".join(problems))
+        self.problems = problems
+
+
+class Item(object):
+    """Compiled item
+    Supports dictionary-style access (item["name"], item.get("statuses"))
+    so the engine works the same with compiled and raw worlds.
+    """
+    __slots__ = ("id", "key", "name", "description", "statuses", "things")
+
+    def __init__(self, id, key, data):
+        self.id = id
+        self.key = key
+        self.name = data["name"]
+        self.description = data["description"]
+        self.statuses = tuple(data.get("statuses", ()))
+        self.things = tuple(data.get("things", ()))
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except (AttributeError, TypeError):
+            raise KeyError(name) from None
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def __repr__(self):
+        return "Item({!r})".format(self.key)
+
+
+class Location(object):
+    """Compiled location
+    Supports dictionary-style access (location["exits"], location.get("things"))
+    so the engine works the same with compiled and raw worlds.
+    """
+    __slots__ = ("id", "key", "name", "description", "things", "exits", "events")
+
+    def __init__(self, id, key, data):
+        self.id = id
+        self.key = key
+        self.name = data["name"]
+        self.description = data["description"]
+        self.things = tuple(sys.intern(item) for item in data.get("things", ()))
+        self.exits = {sys.intern(direction): sys.intern(destination)
+                      for direction, destination in data.get("exits", {}).items()}
+        self.events = data.get("events", {})
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except (AttributeError, TypeError):
+            raise KeyError(name) from None
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def __repr__(self):
+        return "Location({!r})".format(self.key)
+
+
+class CompiledWorld(object):
+    """Validated world, ready to be played by any number of sessions
+    Args:
+        locations - dictionary of location key -> Location
+        items - dictionary of item key -> Item
+        item_events - list of item event dictionaries
+        warnings - list of non-fatal problems found when compiling
+    """
+    def __init__(self, locations, items, item_events, warnings=()):
+        self.locations = locations
+        self.items = items
+        self.item_events = item_events
+        self.warnings = list(warnings)
+        # Lists indexed by ID
+        self.location_list = list(locations.values())
+        self.item_list = list(items.values())
+        self.base_things = BaseThings(locations, items)
+        self.event_index = ItemEventIndex(item_events)
+        self.render_cache = RenderCache(locations, items)
+        self.room_graph = RoomGraph(locations)
+
+    def __getstate__(self):
+        # Shared caches are rebuilt rather than pickled
+        state = dict(self.__dict__)
+        del state["base_things"], state["event_index"], state["render_cache"], state["room_graph"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.base_things = BaseThings(self.locations, self.items)
+        self.event_index = ItemEventIndex(self.item_events)
+        self.render_cache = RenderCache(self.locations, self.items)
+        self.room_graph = RoomGraph(self.locations)
+
+    def new_state(self):
+        """Return a new per-session WorldState for this world"""
+        return WorldState(self.locations, self.items, self.base_things)
+
+
+def check_world(locations, items, item_events):
+    """Check world data for invalid references
+    Args:
+        locations, items, item_events - world data as in adventure_data.py
+    Returns:
+        (errors, warnings) - lists of problem descriptions. Errors make the
+        world unplayable. Warnings are mostly needs for items that don't
+        exist, which can never be met - sometimes deliberate, to block a route.
+    """
+    errors = []
+    warnings = []
+
+    def check_items(where, keys):
+        for key in keys:
+            if key not in items:
+                errors.append("{}: unknown item {!r}".format(where, key))
+
+    def check_needs(where, needs):
+        for kind, needed in needs.items():
+            if kind not in NEEDS_KEYS:
+                errors.append("{}: unknown needs key {!r}".format(where, kind))
+                continue
+            for key in needed:
+                if key not in items:
+                    if kind == "location_not_needs":
+                        warnings.append("{}: {} refers to unknown item {!r}"
+                                        .format(where, kind, key))
+                    else:
+                        warnings.append("{}: needs unknown item {!r}, so can never pass"
+                                        .format(where, key))
+
+    def check_outcome(where, outcome):
+        for name in outcome:
+            if name not in OUTCOME_KEYS:
+                errors.append("{}: unknown outcome key {!r}".format(where, name))
+        if outcome.get("new_location") and outcome["new_location"] not in locations:
+            errors.append("{}: unknown new_location {!r}".format(where, outcome["new_location"]))
+        check_items(where, outcome.get("remove_location_items", ()))
+
+    for key, item in items.items():
+        where = "item {!r}".format(key)
+        for field in ("name", "description"):
+            if field not in item:
+                errors.append("{}: missing {}".format(where, field))
+        check_items(where + " things", item.get("things", ()))
+
+    for key, location in locations.items():
+        where = "location {!r}".format(key)
+        for field in ("name", "description"):
+            if field not in location:
+                errors.append("{}: missing {}".format(where, field))
+        check_items(where + " things", location.get("things", ()))
+        exits = location.get("exits", {})
+        for direction, destination in exits.items():
+            if destination not in locations:
+                errors.append("{} exit {}: unknown location {!r}".format(where, direction, destination))
+        for direction, event in location.get("events", {}).items():
+            event_where = "{} event {}".format(where, direction)
+            if direction not in exits:
+                warnings.append(event_where + ": no exit in that direction")
+            check_needs(event_where, event.get("needs", {}))
+            for outcome in ("pass_outcomes", "fail_outcomes"):
+                check_outcome(event_where + " " + outcome, event.get(outcome, {}))
+
+    for n, event in enumerate(item_events):
+        where = "item event {}".format(n)
+        check_needs(where, event.get("needs", {}))
+        for outcome in ("pass_outcome", "fail_outcome"):
+            check_outcome(where + " " + outcome, event.get(outcome, {}))
+
+    return errors, warnings
+
+
+def compile_world(locations, items, item_events):
+    """Check world data and build its compiled form
+    Args:
+        locations, items, item_events - world data as in adventure_data.py
+    Returns:
+        CompiledWorld
+    Raises:
+        WorldError if the world has invalid references
+    """
+    errors, warnings = check_world(locations, items, item_events)
+    if errors:
+        raise WorldError(errors)
+    compiled_items = {}
+    for key in items:
+        key = sys.intern(key)
+        compiled_items[key] = Item(len(compiled_items), key, items[key])
+    compiled_locations = {}
+    for key in locations:
+        key = sys.intern(key)
+        compiled_locations[key] = Location(len(compiled_locations), key, locations[key])
+    return CompiledWorld(compiled_locations, compiled_items, item_events, warnings)
+
+
+def load_world(path, cache_dir=None):
+    """Load and compile world data module, using a cached compiled form if the
+    module hasn't changed since it was cached.
+    Args:
+        path - file name of Python module defining locations, items and item_events
+        cache_dir - directory for cache files (default __pycache__ next to the module)
+    Returns:
+        CompiledWorld
+    """
+    with open(path, "rb") as source:
+        digest = hashlib.sha256(source.read()).hexdigest()
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), "__pycache__")
+    name = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(cache_dir, "{}.world-{}.pickle".format(name, COMPILER_VERSION))
+
+    try:
+        with open(cache_path, "rb") as cache:
+            cached_digest, world = pickle.load(cache)
+        if cached_digest == digest:
+            return world
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+        # Missing, unreadable or out of date - recompile
+        pass
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    world = compile_world(module.locations, module.items, module.item_events)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path + ".tmp", "wb") as cache:
+        pickle.dump((digest, world), cache, pickle.HIGHEST_PROTOCOL)
+    os.replace(cache_path + ".tmp", cache_path)
+    return world
+
+
+if __name__ == "__main__":
+    # Use the importable module so cached classes aren't pickled as __main__ ones
+    from world_compiler import WorldError, load_world
+    path = sys.argv[1] if len(sys.argv) > 1 else "adventure_data.py"
+    try:
+        world = load_world(path)
+    except WorldError as e:
+        print(e)
+        sys.exit(1)
+    print("{}: {} locations, {} items, {} item events".format(
+        path, len(world.locations), len(world.items), len(world.item_events)))
+    for warning in world.warnings:
+        print("Warning:", warning)
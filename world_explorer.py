@@ -0,0 +1,747 @@
+#!/usr/bin/env python3
+
+""""
+Checks whether a world can be completed, by searching every state it can reach.
+
+explore() searches game states - the player's location and inventory, and
+the things in every location and container that differ from how the world
+started (which is also what item events have done). Each command is played
+by a real Adventure session with rendering switched off, so moves, take,
+drop, open and item events behave exactly as in the game. States are
+deduplicated by a 16 byte hash, and expanding them can be split across a
+pool of worker processes.
+
+Only commands that can make a difference are tried: moving, taking items
+that events need (or containers holding them), dropping items where that
+can help an event pass or fail, and opening containers. Item events that only show a
+message, or only take away items nothing needs, can't change whether the
+goal is reached, so their needs are ignored too.
+
+Three things keep big worlds manageable:
+- walking between hubs in one step. Hubs are the rooms where something can
+  happen - rooms with move events or items worth taking, rooms an event can
+  move the player to, and the start and goal. In the rooms between them
+  nothing changes, so a walk through them isn't a state of its own. Drops
+  are only tried at key locations, so a world that can only be won by
+  dropping something in a room between hubs is reported as unwinnable.
+- items it never hurts to hold (only needed by move events that just show a
+  message when they fail). A state at the same place holding a subset of
+  them, reached in as many commands or more, is skipped.
+- states are expanded in order of commands so far plus the walk to the
+  goal with every move event passing (unless an event can move the player),
+  and rooms that can't reach the goal at all are dropped.
+
+The result is the shortest winning list of commands, or proof that there
+isn't one (every reachable state was searched). For worlds too big to
+search within max_states, it's a winning list that may not be the shortest
+if one was found by then, otherwise no answer either way. Worlds where many
+items are needed to get through (hundreds of move events on the way to the
+goal) can still need more states than that.
+
+Usage: python world_explorer.py [world.py] [--goal Outside] [--start Start]
+                                [--workers N] [--max-states 1000000]
+"""
+
+import argparse
+import hashlib
+import heapq
+import multiprocessing
+import os
+from collections import deque
+
+from adventure_engine import Adventure
+
+
+class ExploreResult(object):
+    """Outcome of explore()
+    Attributes:
+        winnable - True, False (every reachable state searched), or None if
+                   the search stopped at max_states
+        commands - winning list of commands (None unless winnable) - the
+                   shortest, unless the search stopped at max_states
+        states (int) - number of distinct states found
+        depth (int) - number of commands in the longest paths found
+    """
+    def __init__(self, winnable, commands, states, depth):
+        self.winnable = winnable
+        self.commands = commands
+        self.states = states
+        self.depth = depth
+
+    def __repr__(self):
+        return "ExploreResult(winnable={!r}, commands={!r}, states={})".format(
+            self.winnable, self.commands, self.states)
+
+
+def all_outcomes(locations, item_events):
+    """Yield every outcome dictionary in a world"""
+    for location in locations.values():
+        for event in (location.get("events") or {}).values():
+            yield event.get("pass_outcomes", {})
+            yield event.get("fail_outcomes", {})
+    for event in item_events:
+        yield event.get("pass_outcome", {})
+        yield event.get("fail_outcome", {})
+
+
+def all_events(locations, item_events):
+    """Yield (needs, list of outcomes, True for move events) for every event in a world"""
+    for location in locations.values():
+        for event in (location.get("events") or {}).values():
+            yield event.get("needs", {}), [event.get("pass_outcomes", {}),
+                                           event.get("fail_outcomes", {})], True
+    for event in item_events:
+        yield event.get("needs", {}), [event.get("pass_outcome", {}),
+                                       event.get("fail_outcome", {})], False
+
+
+def reachable_locations(locations, item_events, start):
+    """Return set of locations reachable from start through exits or events
+    moving the player, ignoring whether the events pass. Anywhere not in it
+    can't be reached at all.
+    """
+    # Events can move the player from anywhere
+    jumps = {outcome["new_location"] for outcome in all_outcomes(locations, item_events)
+             if outcome.get("new_location")}
+    seen = {start} | jumps
+    queue = deque(seen)
+    while queue:
+        location = locations.get(queue.popleft())
+        if location is None:
+            continue
+        for destination in (location.get("exits") or {}).values():
+            if destination not in seen:
+                seen.add(destination)
+                queue.append(destination)
+    return seen
+
+
+class Explorer(object):
+    """Plays commands from any game state, for one worker of the search
+    Args:
+        world - CompiledWorld (see world_compiler.py) to explore
+        goal - location key the player must reach
+        start_location - location key the player starts in
+    """
+    def __init__(self, world, goal, start_location="Start"):
+        self.world = world
+        self.goal = goal
+        self.game = Adventure("", start_location, compiled_world=world)
+        self.game.rendering = False
+        locations, items = world.locations, world.items
+        events = list(all_events(locations, world.item_events))
+        # Items that matter: anything needed by a move event (it decides
+        # whether the player moves) or by an item event with an outcome that
+        # matters, and containers holding those. An outcome matters if it
+        # moves the player or removes items that matter - item events that
+        # just show a message, or only take away items nothing needs, can't
+        # change whether the goal is reached.
+        self.relevant = set()
+        self.containers = set()
+        counted = set()
+        growing = True
+        while growing:
+            growing = False
+            for n, (needs, outcomes, move_event) in enumerate(events):
+                if n not in counted and (move_event or any(map(self.matters, outcomes))):
+                    counted.add(n)
+                    for kind in ("player_needs", "location_needs", "location_not_needs"):
+                        self.relevant.update(needs.get(kind, ()))
+                    growing = True
+            for key, item in items.items():
+                if key not in self.containers and self.relevant.intersection(item.get("things", ())):
+                    self.containers.add(key)
+                    self.relevant.add(key)
+                    growing = True
+        location_needs = set()
+        # Items some event needs missing from a location
+        absent = set()
+        for n in counted:
+            absent.update(events[n][0].get("location_not_needs", ()))
+
+        def helps(outcome):
+            """Return True if an outcome can help - moves the player, or
+            removes items some event needs missing. Others only take away.
+            """
+            return bool(outcome.get("new_location")
+                        or absent.intersection(outcome.get("remove_location_items", ())))
+
+        # Items worth dropping: needed in a location by a move event or an
+        # event that helps when it passes, or held when the player is better
+        # off failing an event or not setting off an item event
+        self.droppable = set()
+        # Items that make holding more of them worse - see monotone below
+        awkward = set()
+        for n in counted:
+            needs, outcomes, move_event = events[n]
+            location_needs.update(needs.get("location_needs", ()))
+            location_needs.update(needs.get("location_not_needs", ()))
+            if move_event or helps(outcomes[0]):
+                self.droppable.update(needs.get("location_needs", ()))
+                self.droppable.update(needs.get("location_not_needs", ()))
+            if helps(outcomes[1]) or (not move_event and self.matters(outcomes[0])):
+                self.droppable.update(needs.get("player_needs", ()))
+            if not move_event or self.matters(outcomes[1]):
+                awkward.update(needs.get("player_needs", ()))
+            for outcome in outcomes:
+                awkward.update(outcome.get("remove_location_items", ()))
+        # Items worth taking
+        self.takeable = {key for key in self.relevant
+                         if key in items and "fixed" not in items[key].get("statuses", ())}
+        # Items it never hurts to hold: only needed by move events that just
+        # show a message when they fail, never needed in a location, never
+        # removed by an event and never in a container. A state holding more
+        # of them can do everything one holding fewer can.
+        for item in items.values():
+            awkward.update(item.get("things", ()))
+        self.monotone = self.takeable - location_needs - self.containers - awkward
+        # Item events with outcomes that matter, by whether they look at the
+        # player's location
+        self.room_rules = []
+        self.inventory_rules = []
+        for event in world.item_events:
+            if not (self.matters(event.get("pass_outcome", {}))
+                    or self.matters(event.get("fail_outcome", {}))):
+                continue
+            needs = event.get("needs", {})
+            if needs.get("location_needs") or needs.get("location_not_needs"):
+                self.room_rules.append(event)
+            else:
+                self.inventory_rules.append(event)
+        # Items whose presence in a room can set off a room rule
+        self.triggers = set()
+        for event in self.room_rules:
+            self.triggers.update(event["needs"].get("location_needs", ()))
+            self.triggers.update(event["needs"].get("location_not_needs", ()))
+        # A room rule that matters when it fails (or passes when items are
+        # absent) can fire in any room, so every move has to be played
+        self.walkable = not any(self.matters(event.get("fail_outcome", {}))
+                                or (event["needs"].get("location_not_needs")
+                                    and self.matters(event.get("pass_outcome", {})))
+                                for event in self.room_rules)
+        # Rooms starting with triggers, and key locations - rooms with move
+        # events or starting with items worth taking
+        self.trigger_rooms = set()
+        self.key_locations = set()
+        # Location key -> list of (direction, destination) of its exits
+        self.exits = {}
+        # Hubs - the only rooms where anything can happen: key locations
+        # (items are only dropped or tipped out of containers in those),
+        # rooms with triggers, and anywhere an event can leave the player
+        self.hubs = {start_location, goal}
+        for key, location in locations.items():
+            things = location.get("things", ())
+            events = location.get("events") or {}
+            exits = location.get("exits") or {}
+            self.exits[key] = list(exits.items())
+            if self.triggers.intersection(things):
+                self.trigger_rooms.add(key)
+            if events or self.takeable.intersection(things):
+                self.key_locations.add(key)
+            self.hubs.update(exits[direction] for direction in events if direction in exits)
+        for outcome in all_outcomes(locations, world.item_events):
+            if outcome.get("new_location"):
+                self.hubs.add(outcome["new_location"])
+        self.hubs |= self.key_locations | self.trigger_rooms
+        # Location key -> moves to the goal if every move event passed. No way
+        # of winning takes fewer commands, unless an event can move the player.
+        # Locations missing from it can't reach the goal at all.
+        self.to_goal = None
+        if not any(outcome.get("new_location")
+                   for outcome in all_outcomes(locations, world.item_events)):
+            entrances = {}
+            for key, exits in self.exits.items():
+                for direction, destination in exits:
+                    entrances.setdefault(destination, []).append(key)
+            self.to_goal = {goal: 0}
+            queue = deque([goal])
+            while queue:
+                key = queue.popleft()
+                for previous in entrances.get(key, ()):
+                    if previous not in self.to_goal:
+                        self.to_goal[previous] = self.to_goal[key] + 1
+                        queue.append(previous)
+        # Location key -> walks to the nearest hubs by each exit (see walks_from)
+        self.walks = {}
+        # Location key -> frozenset of the things it starts with
+        self.base_things = {}
+
+    def estimate(self, location_key):
+        """Return fewest commands that could reach the goal from location_key
+        (None if it can't be reached from there)
+        """
+        if self.to_goal is None:
+            return 0
+        return self.to_goal.get(location_key)
+
+    def matters(self, outcome):
+        """Return True if an event outcome moves the player or removes items that matter"""
+        return bool(outcome.get("new_location")
+                    or self.relevant.intersection(outcome.get("remove_location_items", ())))
+
+    def base(self, key):
+        """Return frozenset of the things that matter location starts with"""
+        things = self.base_things.get(key)
+        if things is None:
+            things = self.base_things[key] = self.relevant.intersection(
+                self.world.locations[key].get("things", ()))
+        return things
+
+    def state_of(self, game):
+        """Return canonical state of game - order of items, and items that
+        don't matter, are left out
+        Returns:
+            (location key, inventory, changed locations, changed containers) where
+            changed ones are sorted tuples of (key, sorted tuple of items)
+        """
+        relevant = self.relevant
+        world = game.world
+        things = []
+        for key, changed in world.changed_things.items():
+            kept = relevant.intersection(changed)
+            if kept != self.base(key):
+                things.append((key, tuple(sorted(kept))))
+        items = self.world.items
+        contents = []
+        for key, changed in world.changed_contents.items():
+            kept = relevant.intersection(changed)
+            if key in relevant and kept != relevant.intersection(items[key].get("things", ())):
+                contents.append((key, tuple(sorted(kept))))
+        return (game.location_key, tuple(sorted(relevant.intersection(game.inventory))),
+                tuple(sorted(things)), tuple(sorted(contents)))
+
+    def split(self, state):
+        """Split state into the monotone items held and everything else
+        Returns:
+            (key of state without monotone items, frozenset of monotone items held)
+        """
+        monotone = self.monotone
+        location_key, inventory, things, contents = state
+        if not monotone:
+            return state_key(state), frozenset()
+        # Monotone items are only ever taken, so where they all are follows
+        # from which ones are held
+        others = []
+        for key, changed in things:
+            kept = tuple(item for item in changed if item not in monotone)
+            if frozenset(kept) != self.base(key) - monotone:
+                others.append((key, kept))
+        rest = (location_key, tuple(item for item in inventory if item not in monotone),
+                tuple(others), contents)
+        return state_key(rest), frozenset(monotone.intersection(inventory))
+
+    def load(self, state):
+        """Put the game into state
+        The game's item event tracker is kept, with rules mentioning items
+        that differ from the last state marked for re-checking, so item
+        events aren't all evaluated again for every state.
+        """
+        game = self.game
+        location_key, inventory, things, contents = state
+        old_inventory = set(game.inventory)
+        old_present = set(game.location_things)
+        world = self.world.new_state()
+        for key, changed in things:
+            world.mutable_things(key).replace(changed)
+        for key, changed in contents:
+            world.mutable_contents(key).replace(changed)
+        game.world = world
+        game.location_key = location_key
+        game.inventory.replace(inventory)
+        tracker = game.event_tracker
+        tracker.touch(*old_inventory.symmetric_difference(inventory))
+        tracker.touch(*old_present.symmetric_difference(game.location_things))
+        tracker.location_key = location_key
+
+    def quiet(self, key):
+        """Return True if no item event would change anything with the
+        loaded game's player in location key
+        """
+        game = self.game
+        here = game.location_key
+        game.location_key = key
+        try:
+            for event in self.room_rules:
+                passed = game.event_check(**event["needs"])
+                if self.matters(event.get("pass_outcome" if passed else "fail_outcome", {})):
+                    return False
+            return True
+        finally:
+            game.location_key = here
+
+    def walks_from(self, key):
+        """Return walks from location key to the hubs nearest it
+        Rooms between hubs have no events and never hold triggers, so these
+        are worked out once for the whole search. Exits with move events
+        always lead to a hub.
+        Returns:
+            list of (move event, command, list of (hub, length of walk,
+            location the last move is made from, last move)) - one for each
+            exit with a move event, and one with event and command None for
+            walks through the other exits
+        """
+        walks = self.walks.get(key)
+        if walks is not None:
+            return walks
+        walks = self.walks[key] = []
+        exits, hubs = self.exits, self.hubs
+        events = self.world.locations[key].get("events") or {}
+        # Location key -> moves walking there
+        lengths = {key: 0}
+        ends = []
+        queue = deque()
+        for direction, destination in exits[key]:
+            command = "go " + direction
+            if direction in events:
+                walks.append((events[direction], command,
+                              [(destination, 1, key, command)] if destination in exits else []))
+            elif destination in exits and destination not in lengths:
+                lengths[destination] = 1
+                if destination in hubs:
+                    ends.append((destination, 1, key, command))
+                else:
+                    queue.append(destination)
+        while queue:
+            room = queue.popleft()
+            length = lengths[room] + 1
+            for direction, destination in exits[room]:
+                if destination not in lengths and destination in exits:
+                    lengths[destination] = length
+                    if destination in hubs:
+                        ends.append((destination, length, room, "go " + direction))
+                    else:
+                        queue.append(destination)
+        walks.append((None, None, ends))
+        return walks
+
+    def walk_between(self, start, end):
+        """Return list of commands for the walk from start to end found by walks_from()"""
+        exits, hubs = self.exits, self.hubs
+        events = self.world.locations[start].get("events") or {}
+        # Location key -> (previous location, command moving from it)
+        parents = {start: None}
+        queue = deque([start])
+        while end not in parents:
+            room = queue.popleft()
+            for direction, destination in exits[room]:
+                if room == start and direction in events:
+                    continue
+                if destination not in parents and destination in exits:
+                    parents[destination] = (room, "go " + direction)
+                    if destination not in hubs:
+                        queue.append(destination)
+        commands = []
+        while end != start:
+            end, command = parents[end]
+            commands.append(command)
+        commands.reverse()
+        return commands
+
+    def spell(self, route):
+        """Return list of commands for a route
+        Args:
+            route - list of commands and (start, end, length) walks between them
+        """
+        commands = []
+        for step in route:
+            if isinstance(step, tuple):
+                commands += self.walk_between(step[0], step[1])
+            else:
+                commands.append(step)
+        return commands
+
+    def walk(self, state):
+        """Find the hubs the player can walk to from state without anything
+        else changing, and the moves on the way that do change something
+        Routes are lists of commands and (start, end, length) walks (see spell()).
+        Returns:
+            (dict of hub -> (length, route walking there), list of (location
+             key, length, route walking there, command) for the other moves)
+        """
+        game = self.game
+        location_key, inventory, things, contents = state
+        routes = {location_key: (0, [])}
+        walkable = self.walkable and not any(
+            self.matters(event.get("pass_outcome" if game.event_check(**event.get("needs", {}))
+                                   else "fail_outcome", {}))
+            for event in self.inventory_rules)
+        if not walkable:
+            # Something happens every turn, so every move has to be played
+            return routes, [(location_key, 0, [], "go " + direction)
+                            for direction, destination in self.exits.get(location_key, ())]
+        # Hubs that might hold triggers now
+        suspects = set(self.trigger_rooms)
+        for key, changed in things:
+            if self.triggers.intersection(changed):
+                suspects.add(key)
+            else:
+                suspects.discard(key)
+        still = {}
+
+        def is_still(key):
+            """Return True if nothing happens with the player in location key"""
+            if key not in suspects:
+                return True
+            if key not in still:
+                still[key] = self.quiet(key)
+            return still[key]
+
+        # (location key, command) -> (length, route) of shortest walk there,
+        # for moves that change something
+        moves = {}
+        queue = [(0, location_key)]
+        done = set()
+        while queue:
+            length, key = heapq.heappop(queue)
+            if key in done:
+                continue
+            done.add(key)
+            route = routes[key][1]
+            for event, command, ends in self.walks_from(key):
+                if event:
+                    game.location_key = key
+                    passed = game.event_check(**event["needs"])
+                    game.location_key = location_key
+                    if self.matters(event["pass_outcomes" if passed else "fail_outcomes"]):
+                        moves.setdefault((key, command), (length, route))
+                        continue
+                    if not passed:
+                        # Blocked - the player stays where they are
+                        if not is_still(key):
+                            moves.setdefault((key, command), (length, route))
+                        continue
+                for hub, steps, last, move in ends:
+                    if hub in routes and routes[hub][0] <= length + steps:
+                        continue
+                    if is_still(hub):
+                        walk = [command] if command else [(key, hub, steps)]
+                        routes[hub] = (length + steps, route + walk)
+                        if hub != self.goal:
+                            heapq.heappush(queue, (length + steps, hub))
+                    elif (last, move) not in moves or moves[last, move][0] > length + steps - 1:
+                        walk = [(key, last, steps - 1)] if last != key else []
+                        moves[last, move] = (length + steps - 1, route + walk)
+        return routes, [(key, length, route, command)
+                        for (key, command), (length, route) in moves.items()]
+
+    def expand(self, state):
+        """Play every command worth trying in state and at every hub the player
+        can walk to from it
+        Takes and opens are tried wherever there are items to take or open.
+        Drops and opening what the player holds are only tried in key
+        locations: where the player is, rooms with move events, where items
+        started or can be taken, and where a move does more than show a message.
+        Returns:
+            list of (route (see walk()), number of commands, new state, True
+            if it reached the goal)
+        """
+        game = self.game
+        self.load(state)
+        location_key, inventory, things, contents = state
+        routes, moves = self.walk(state)
+        world = game.world
+        results = []
+        if self.goal in routes:
+            length, route = routes[self.goal]
+            results.append((route, length, (self.goal,) + state[1:], True))
+        key_locations = {location_key} | {key for key, length, route, command in moves}
+        actions = moves
+        for key, (length, route) in routes.items():
+            if key == self.goal:
+                continue
+            present = list(world.things(key))
+            commands = ["take " + item for item in present if item in self.takeable]
+            commands += ["open " + item for item in present
+                         if item in self.containers and world.contents(item)]
+            if commands or key in key_locations or key in self.key_locations:
+                commands += ["drop " + item for item in inventory if item in self.droppable]
+                commands += ["open " + item for item in inventory
+                             if item in self.containers and world.contents(item)]
+            actions += [(key, length, route, command) for command in commands]
+        for key, length, route, command in actions:
+            self.load((key,) + state[1:])
+            game.read_input(command)
+            game.parse()
+            game.item_events_check()
+            results.append((route + [command], length + 1, self.state_of(game),
+                            game.location_key == self.goal))
+        return results
+
+
+def state_key(state):
+    """Return compact hash of a state, for deduplication"""
+    return hashlib.blake2b(repr(state).encode("utf-8"), digest_size=16).digest()
+
+
+def expand_states(explorer, states):
+    """Expand each state, keeping the shortest way to each new state within the batch
+    Args:
+        states - list of (distance from the start, state)
+    Returns:
+        list of (parent key, route (see Explorer.walk()), distance, child key,
+        monotone split of child (see Explorer.split), child state, won)
+    """
+    found = {}
+    for distance, state in states:
+        parent = state_key(state)
+        for route, length, child, won in explorer.expand(state):
+            key = state_key(child)
+            length += distance
+            if key not in found or found[key][2] > length:
+                found[key] = (parent, route, length, key, explorer.split(child), child, won)
+    return list(found.values())
+
+
+# Explorer of a worker process in the pool
+worker_explorer = None
+
+
+def start_worker(world, goal, start_location):
+    """Pool initializer - make the worker's Explorer"""
+    global worker_explorer
+    worker_explorer = Explorer(world, goal, start_location)
+
+
+def expand_in_worker(states):
+    """Pool task - expand a chunk of states"""
+    return expand_states(worker_explorer, states)
+
+
+def dominated(entries, held, distance, strict=False):
+    """Return True if a state holding held monotone items at distance is no
+    better than one already found
+    Args:
+        entries - list of (monotone items held, distance) of states found
+                  that differ from this one only in monotone items
+        strict (bool) - only count states holding more items (for a state
+                        checking against its own entry)
+    """
+    for other, other_distance in entries:
+        if other_distance <= distance and (other > held if strict else other >= held):
+            return True
+    return False
+
+
+def explore(world, goal="Outside", start_location="Start", workers=1, max_states=1000000,
+            chunk_size=16):
+    """Search for the shortest way to reach the goal
+    Args:
+        world - CompiledWorld to explore
+        goal - location key the player must reach
+        start_location - location key the player starts in
+        workers (int) - processes to share the search between (1 for none)
+        max_states (int) - give up after finding this many distinct states
+        chunk_size (int) - states sent to a worker at a time
+    Returns:
+        ExploreResult
+    """
+    if goal not in reachable_locations(world.locations, world.item_events, start_location):
+        return ExploreResult(False, None, 0, 0)
+    if start_location == goal:
+        return ExploreResult(True, [], 1, 0)
+    explorer = Explorer(world, goal, start_location)
+    start = explorer.state_of(explorer.game)
+    start_key = state_key(start)
+    # State key -> (parent state key, route leading from parent), for
+    # working out the path once the goal is reached
+    parents = {start_key: None}
+    distances = {start_key: 0}
+    # Key of state without monotone items -> list of (monotone items held,
+    # distance) of the states found
+    held_by = {}
+    rest, held = explorer.split(start)
+    held_by[rest] = [(held, 0)]
+    # Least commands a win through a state could take -> list of (state key,
+    # key without monotone items, monotone items held, distance, state)
+    # still to expand, so states nearer the goal are expanded first
+    pending = {explorer.estimate(start_location): [(start_key, rest, held, 0, start)]}
+    best = None
+    depth = 0
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, start_worker, (world, goal, start_location))
+    try:
+        while pending:
+            bound = min(pending)
+            if best is not None and distances[best] <= bound:
+                break
+            frontier = [(distance, state)
+                        for key, rest, held, distance, state in pending.pop(bound)
+                        if distances[key] == distance
+                        and not dominated(held_by[rest], held, distance, strict=True)]
+            if pool is not None and len(frontier) > chunk_size:
+                chunks = [frontier[n:n + chunk_size] for n in range(0, len(frontier), chunk_size)]
+                batches = pool.imap_unordered(expand_in_worker, chunks)
+            else:
+                batches = [expand_states(explorer, frontier)]
+            for batch in batches:
+                for parent, route, distance, key, (rest, held), child, won in batch:
+                    if key in distances and distances[key] <= distance:
+                        continue
+                    remaining = explorer.estimate(child[0])
+                    if remaining is None:
+                        continue
+                    entries = held_by.setdefault(rest, [])
+                    if dominated(entries, held, distance):
+                        continue
+                    entries.append((held, distance))
+                    parents[key] = (parent, route)
+                    distances[key] = distance
+                    depth = max(depth, distance)
+                    if won:
+                        if best is None or distances[best] > distance:
+                            best = key
+                    else:
+                        pending.setdefault(distance + remaining, []).append(
+                            (key, rest, held, distance, child))
+                    if len(parents) >= max_states:
+                        if best is None:
+                            return ExploreResult(None, None, len(parents), depth)
+                        # Winnable, but there may be a shorter way
+                        commands = explorer.spell(path_to(parents, best))
+                        return ExploreResult(True, commands, len(parents), depth)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    if best is not None:
+        return ExploreResult(True, explorer.spell(path_to(parents, best)), len(parents), depth)
+    return ExploreResult(False, None, len(parents), depth)
+
+
+def path_to(parents, key):
+    """Return route leading from the start to state key"""
+    route = []
+    while parents[key] is not None:
+        key, steps = parents[key]
+        route[:0] = steps
+    return route
+
+
+if __name__ == "__main__":
+    # Use the importable modules so compiled worlds aren't pickled as __main__ ones
+    from world_compiler import WorldError, load_world
+    from world_explorer import explore
+    parser = argparse.ArgumentParser(description="Check whether a world can be completed")
+    parser.add_argument("world", nargs="?", default="adventure_data.py",
+                        help="world data module (default adventure_data.py)")
+    parser.add_argument("--goal", default="Outside", help="location key to reach")
+    parser.add_argument("--start", default="Start", help="start location key")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-states", type=int, default=1000000)
+    args = parser.parse_args()
+    try:
+        world = load_world(args.world)
+    except WorldError as e:
+        parser.exit(1, "{}\n".format(e))
+    result = explore(world, args.goal, args.start, args.workers, args.max_states)
+    if result.winnable:
+        print("Winnable in {} commands ({} states searched{}):".format(
+            len(result.commands), result.states,
+            ", may not be the shortest" if result.states >= args.max_states else ""))
+        for command in result.commands:
+            print("  " + command)
+    elif result.winnable is False:
+        print("Can't be won - all {} reachable states searched".format(result.states))
+    else:
+        print("No answer - gave up after {} states, {} commands deep".format(
+            result.states, result.depth))
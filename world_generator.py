@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+""""
+Procedural world generator for scale and stress testing.
+
+generate_world() builds locations, items and item_events in the same form
+as adventure_data.py, from a seed, so the same settings always give the
+same world and benchmark results can be compared between runs. All rooms
+are reachable from "Start" and exits always lead back the way they came.
+
+Usage: python world_generator.py --rooms 100000 --rules 10000 --shards world_dir
+       python world_generator.py --rooms 500 --module big_world.py
+"""
+
+import argparse
+import pprint
+import random
+
+from world_shards import write_sharded_world
+
+# Direction -> opposite direction
+OPPOSITES = {"north": "south", "south": "north", "east": "west",
+             "west": "east", "up": "down", "down": "up"}
+
+ADJECTIVES = ["Dusty", "Gloomy", "Open-plan", "Cramped", "Beige", "Echoing",
+              "Abandoned", "Flickering", "Carpeted", "Draughty", "Windowless", "Humming"]
+ROOMS = ["Office", "Meeting Room", "Corridor", "Kitchenette", "Store Room",
+         "Server Room", "Print Room", "Break-out Area", "Landing", "Archive"]
+THINGS = ["Stapler", "Mug", "Lanyard", "Binder", "Hole Punch", "Desk Fan",
+          "Post-it Note", "Ring Binder", "Keyboard", "Potted Plant", "Memo", "Toner Cartridge"]
+
+
+def generate_world(rooms=1000, item_density=1.0, fan_out=2.5, move_events=100, rules=100,
+                   region_size=1000, start_items=0, seed=1):
+    """Generate a world
+    Args:
+        rooms (int) - number of locations
+        item_density (float) - mean number of items per location
+        fan_out (float) - mean number of exits per location (at most 6)
+        move_events (int) - number of exits guarded by an event needing an item
+        rules (int) - number of item_events rules
+        region_size (int) - locations per region (region n holds rooms
+                            n * region_size onwards - see region_of())
+        start_items (int) - extra items placed in "Start", to stress e.g. "take all"
+        seed - random seed
+    Returns:
+        (locations, items, item_events)
+    """
+    rng = random.Random(seed)
+    keys = ["Start"] + ["room{}".format(n) for n in range(1, rooms)]
+    exits = [{} for _ in keys]
+
+    def link(a, b):
+        """Join rooms a and b by a free pair of opposite directions, if there is one"""
+        free = [d for d in OPPOSITES if d not in exits[a] and OPPOSITES[d] not in exits[b]]
+        if not free:
+            return False
+        direction = rng.choice(free)
+        exits[a][direction] = keys[b]
+        exits[b][OPPOSITES[direction]] = keys[a]
+        return True
+
+    # Spanning tree first, so everywhere can be reached. Mostly join rooms
+    # to recent ones, so regions are mostly joined to themselves.
+    for n in range(1, rooms):
+        tries = 0
+        while not link(n, max(0, n - rng.randint(1, 20)) if tries < 20 else rng.randrange(n)):
+            tries += 1
+    # Then extra exits up to the wanted fan-out
+    extra = int(rooms * min(fan_out, 6) / 2) - (rooms - 1)
+    for _ in range(max(extra, 0) * 2):
+        if extra <= 0:
+            break
+        a = rng.randrange(rooms)
+        b = min(rooms - 1, max(0, a + rng.randint(-50, 50)))
+        if a != b and keys[b] not in exits[a].values() and link(a, b):
+            extra -= 1
+
+    items = {}
+    item_count = int(rooms * item_density) + start_items
+    for n in range(item_count):
+        key = "item{}".format(n)
+        thing = rng.choice(THINGS)
+        items[key] = {"name": "{} {}".format(thing, n),
+                      "description": "A {} with an asset tag reading {}.".format(thing.lower(), n)}
+        if rng.random() < 0.05:
+            items[key]["statuses"] = ["fixed"]
+    item_keys = list(items)
+
+    things = [[] for _ in keys]
+    for n in range(start_items):
+        things[0].append(item_keys[n])
+    for key in item_keys[start_items:]:
+        things[rng.randrange(rooms)].append(key)
+
+    locations = {}
+    for n, key in enumerate(keys):
+        name = "{} {} {}".format(rng.choice(ADJECTIVES), rng.choice(ROOMS), n)
+        locations[key] = {"name": name,
+                          "description": "{}, much like the others on floor {}.".format(
+                              name, n // region_size),
+                          "things": things[n],
+                          "exits": exits[n]}
+
+    for n in range(move_events):
+        location = locations[keys[rng.randrange(rooms)]]
+        # Rooms without exits (a world of one room) have nowhere to guard
+        if not location["exits"]:
+            continue
+        direction = rng.choice(list(location["exits"]))
+        needed = rng.choice(item_keys) if item_keys else "nothing"
+        location.setdefault("events", {})[direction] = {
+            "needs": {"player_needs": [needed]},
+            "pass_outcomes": {"message": "The {} gets you through.".format(needed)},
+            "fail_outcomes": {"message": "A door marked {} won't open.".format(n)}}
+
+    item_events = []
+    for n in range(rules):
+        needs = {"location_needs": rng.sample(item_keys, min(2, len(item_keys)))}
+        if rng.random() < 0.3 and item_keys:
+            needs["player_needs"] = rng.sample(item_keys, 1)
+        rule = {"needs": needs, "pass_outcome": {"message": "Something happens ({}).".format(n)}}
+        if rng.random() < 0.1:
+            rule["pass_outcome"]["remove_location_items"] = list(needs["location_needs"])
+        item_events.append(rule)
+
+    return locations, items, item_events
+
+
+def region_of(key, region_size=1000):
+    """Return region number of a generated location key - for write_sharded_world()"""
+    if key == "Start":
+        return 0
+    return int(key[4:]) // region_size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a world for testing")
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--item-density", type=float, default=1.0)
+    parser.add_argument("--fan-out", type=float, default=2.5)
+    parser.add_argument("--move-events", type=int, default=100)
+    parser.add_argument("--rules", type=int, default=100)
+    parser.add_argument("--region-size", type=int, default=1000)
+    parser.add_argument("--start-items", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--module", help="write world as a Python data module to this file")
+    parser.add_argument("--shards", help="write world as shards to this directory")
+    args = parser.parse_args()
+
+    world = generate_world(args.rooms, args.item_density, args.fan_out, args.move_events,
+                           args.rules, args.region_size, args.start_items, args.seed)
+    if args.module:
+        with open(args.module, "w") as f:
+            f.write('"""Generated by world_generator.py - {}"""\n\n'.format(vars(args)))
+            f.write('intro_text = "A generated world."\n\n')
+            for name, data in zip(("locations", "items", "item_events"), world):
+                f.write("{} = {}\n\n".format(name, pprint.pformat(data, width=120, sort_dicts=False)))
+    if args.shards:
+        write_sharded_world(args.shards, *world,
+                            region=lambda key: region_of(key, args.region_size))
+    if not (args.module or args.shards):
+        locations, items, item_events = world
+        print("{} locations, {} items, {} item events (use --module or --shards to save)".format(
+            len(locations), len(items), len(item_events)))
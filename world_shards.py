@@ -0,0 +1,212 @@
+""""
+Sharded storage for very large worlds, loaded on demand.
+
+write_sharded_world() splits a world's locations and items into shard files
+by region, plus an index file for each, mapping keys to shards.
+load_sharded_world() opens them without loading any shard: the indexes
+are memory-mapped and searched in place, and a shard is only read the
+first time a location or item in it is looked up. Least recently used
+shards are dropped once more than max_shards are loaded.
+
+ShardedMapping behaves like a read-only dictionary, so the engine's
+lookups (locations.get(key), items[key], key in locations) work the same
+for sharded worlds as for the stock world.
+
+Index file format - integers little-endian:
+    b"OAI1", record count (uint32)
+    record offsets (uint32 each), in key order
+    records - shard number (uint32), key length (uint16), UTF-8 key
+"""
+
+import mmap
+import os
+import pickle
+import struct
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from item_rules import ItemEventIndex
+from render_cache import RenderCache
+from room_graph import RoomGraph
+from world_compiler import WorldError, check_world
+from world_state import BaseThings, WorldState
+
+INDEX_MAGIC = b"OAI1"
+HEADER = struct.Struct("<4sI")
+OFFSET = struct.Struct("<I")
+RECORD = struct.Struct("<IH")
+
+
+def write_sharded_world(directory, locations, items, item_events, region=None, shard_size=1000):
+    """Check a world and write it as shards
+    Args:
+        directory - directory to write to (created if needed)
+        locations, items, item_events - world data as in adventure_data.py
+        region - optional function(location key) returning the location's
+                 region name. Each region becomes one shard. By default
+                 locations are grouped shard_size at a time in dictionary order.
+        shard_size (int) - locations (or items) per shard when not grouped by region
+    Raises:
+        WorldError if the world has invalid references
+    """
+    errors, warnings = check_world(locations, items, item_events)
+    if errors:
+        raise WorldError(errors)
+    os.makedirs(directory, exist_ok=True)
+
+    if region is None:
+        location_keys = list(locations)
+        region = {key: n // shard_size for n, key in enumerate(location_keys)}.get
+    write_shards(directory, "locations", locations, region)
+
+    # Items go in the shard of the region where they start (where they're
+    # usually looked up), or are grouped shard_size at a time if nowhere
+    item_region = {}
+    for key, location in locations.items():
+        for item in location.get("things", ()):
+            item_region.setdefault(item, region(key))
+    spare = [key for key in items if key not in item_region]
+    for n, key in enumerate(spare):
+        item_region[key] = ("unplaced", n // shard_size)
+    write_shards(directory, "items", items, item_region.get)
+
+    with open(os.path.join(directory, "item_events.pickle"), "wb") as f:
+        pickle.dump(item_events, f, pickle.HIGHEST_PROTOCOL)
+
+
+def write_shards(directory, kind, data, region):
+    """Write one kind of data (locations or items) as shard files and an index"""
+    shards = OrderedDict()
+    for key, value in data.items():
+        shards.setdefault(region(key), {})[key] = value
+    shard_of = {}
+    for number, shard in enumerate(shards.values()):
+        with open(os.path.join(directory, "{}-{}.shard".format(kind, number)), "wb") as f:
+            pickle.dump(shard, f, pickle.HIGHEST_PROTOCOL)
+        for key in shard:
+            shard_of[key] = number
+
+    encoded = sorted((key.encode("utf-8"), number) for key, number in shard_of.items())
+    offsets = []
+    position = HEADER.size + OFFSET.size * len(encoded)
+    for key, number in encoded:
+        offsets.append(position)
+        position += RECORD.size + len(key)
+    with open(os.path.join(directory, kind + ".index"), "wb") as f:
+        f.write(HEADER.pack(INDEX_MAGIC, len(encoded)))
+        for offset in offsets:
+            f.write(OFFSET.pack(offset))
+        for key, number in encoded:
+            f.write(RECORD.pack(number, len(key)))
+            f.write(key)
+
+
+class ShardedMapping(Mapping):
+    """Read-only dictionary of locations or items, loading shards on demand
+    Args:
+        directory - directory written by write_sharded_world()
+        kind - "locations" or "items"
+        max_shards (int) - number of shards kept loaded
+    """
+    def __init__(self, directory, kind, max_shards=64):
+        self.directory = directory
+        self.kind = kind
+        self.max_shards = max_shards
+        # Shard number -> dictionary of its contents, least recently used first
+        self.loaded = OrderedDict()
+        self.loads = 0
+        with open(os.path.join(directory, kind + ".index"), "rb") as f:
+            self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.index, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError("Not a shard index: " + f.name)
+
+    def record(self, n):
+        """Return (key bytes, shard number) of nth index record"""
+        offset, = OFFSET.unpack_from(self.index, HEADER.size + OFFSET.size * n)
+        number, length = RECORD.unpack_from(self.index, offset)
+        start = offset + RECORD.size
+        return self.index[start:start + length], number
+
+    def shard_number(self, key):
+        """Return number of shard holding key (None if not present)"""
+        if not isinstance(key, str):
+            return None
+        wanted = key.encode("utf-8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            found, number = self.record(middle)
+            if found < wanted:
+                low = middle + 1
+            elif found > wanted:
+                high = middle
+            else:
+                return number
+        return None
+
+    def shard(self, number):
+        """Return contents of shard, loading it if needed"""
+        loaded = self.loaded
+        shard = loaded.get(number)
+        if shard is not None:
+            loaded.move_to_end(number)
+            return shard
+        path = os.path.join(self.directory, "{}-{}.shard".format(self.kind, number))
+        with open(path, "rb") as f:
+            shard = pickle.load(f)
+        self.loads += 1
+        loaded[number] = shard
+        if len(loaded) > self.max_shards:
+            loaded.popitem(last=False)
+        return shard
+
+    def __getitem__(self, key):
+        number = self.shard_number(key)
+        if number is None:
+            raise KeyError(key)
+        return self.shard(number)[key]
+
+    def __contains__(self, key):
+        return self.shard_number(key) is not None
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        # Keys in index order - doesn't load any shards
+        for n in range(self.count):
+            yield self.record(n)[0].decode("utf-8")
+
+
+class ShardedWorld(object):
+    """World loaded from shards, usable like a CompiledWorld:
+    Adventure(..., compiled_world=load_sharded_world(directory))
+    Args:
+        directory - directory written by write_sharded_world()
+        max_shards (int) - number of shards of each kind kept loaded
+    """
+    def __init__(self, directory, max_shards=64):
+        self.locations = ShardedMapping(directory, "locations", max_shards)
+        self.items = ShardedMapping(directory, "items", max_shards)
+        # Indexed starting things, bounded like the loaded shards
+        self.base_things = BaseThings(self.locations, self.items, max_size=max_shards * 1000)
+        with open(os.path.join(directory, "item_events.pickle"), "rb") as f:
+            self.item_events = pickle.load(f)
+        self.event_index = ItemEventIndex(self.item_events)
+        self.render_cache = RenderCache(self.locations, self.items)
+        # Note that the first travel command reads every location shard once
+        # to build the graph
+        self.room_graph = RoomGraph(self.locations)
+
+    def new_state(self):
+        """Return a new per-session WorldState for this world"""
+        return WorldState(self.locations, self.items, self.base_things)
+
+
+def load_sharded_world(directory, max_shards=64):
+    """Open a sharded world without loading any shards
+    Returns:
+        ShardedWorld
+    """
+    return ShardedWorld(directory, max_shards)
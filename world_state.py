@@ -0,0 +1,131 @@
+""""
+Per-session copy-on-write view of the game world.
+
+The locations dictionary from adventure_data.py is shared, read-only, by
+every session in the process. A WorldState only holds copies of the
+"things" lists the session has actually changed (items taken, dropped or
+removed by events), so its memory grows with the number of changes rather
+than with the size of the world. The same goes for the contents of
+container items, such as the cake.
+
+Things nobody has changed are read through BaseThings, which indexes each
+location's (and container's) starting things the first time they're looked
+up, once for all sessions sharing it, so checking whether an item is in an
+untouched room doesn't mean scanning its list.
+"""
+
+from containers import ItemList
+
+
+class BaseThings(object):
+    """Shared, read-only ItemLists of a world's starting things, built as needed
+    Args:
+        locations - base locations dictionary. Never modified.
+        items - base items dictionary, for container contents. Never modified.
+        max_size (int) - most ItemLists kept of each kind, oldest dropped
+                         first (None for no limit)
+    """
+    def __init__(self, locations, items=None, max_size=None):
+        self.locations = locations
+        self.items = items if items is not None else {}
+        self.max_size = max_size
+        # Location key -> ItemList of its starting things
+        self.location_things = {}
+        # Container item key -> ItemList of its starting contents
+        self.item_things = {}
+
+    def location(self, key):
+        """Return ItemList of location's starting things. Don't change it."""
+        things = self.location_things.get(key)
+        if things is None:
+            things = self.add(self.location_things, key, self.locations[key])
+        return things
+
+    def item(self, key):
+        """Return ItemList of container item's starting contents. Don't change it."""
+        things = self.item_things.get(key)
+        if things is None:
+            things = self.add(self.item_things, key, self.items[key])
+        return things
+
+    def add(self, cache, key, data):
+        """Index data's things, keeping it in cache"""
+        if self.max_size is not None and len(cache) >= self.max_size:
+            del cache[next(iter(cache))]
+        things = cache[key] = ItemList(data.get("things", ()))
+        return things
+
+
+class WorldState(object):
+    """Copy-on-write overlay on a shared locations dictionary
+    Args:
+        locations - base locations dictionary. Never modified.
+        items - base items dictionary, for container contents. Never modified.
+        base - optional BaseThings for the world, shared with other sessions.
+               By default one of the session's own.
+    """
+    def __init__(self, locations, items=None, base=None):
+        self.locations = locations
+        self.items = items if items is not None else {}
+        self.base = base if base is not None else BaseThings(locations, self.items)
+        # Location key -> this session's copy of that location's things (ItemList)
+        self.changed_things = {}
+        # Container item key -> this session's copy of its contents (ItemList)
+        self.changed_contents = {}
+        # Location key -> count of changes made to that location's things
+        self.versions = {}
+
+    def location(self, key):
+        """Return base data for location (or None if no such location)"""
+        return self.locations.get(key)
+
+    def things(self, key):
+        """Return items present in location. Treat as read-only -
+        use mutable_things() to make changes.
+        Args:
+            key - location key
+        """
+        things = self.changed_things.get(key)
+        if things is None:
+            things = self.base.location(key)
+        return things
+
+    def version(self, key):
+        """Return number of times location's things have been changed (0 if never)"""
+        return self.versions.get(key, 0)
+
+    def mutable_things(self, key):
+        """Return this session's own, changeable ItemList of items in location.
+        Copies the shared list the first time the location is changed.
+        Counts as a change to the location, so only call when about to change it.
+        Args:
+            key - location key
+        """
+        self.versions[key] = self.versions.get(key, 0) + 1
+        things = self.changed_things.get(key)
+        if things is None:
+            things = ItemList(self.base.location(key))
+            self.changed_things[key] = things
+        return things
+
+    def contents(self, item):
+        """Return items inside a container item (empty if not a container).
+        Treat as read-only - use mutable_contents() to make changes.
+        Args:
+            item - item key
+        """
+        contents = self.changed_contents.get(item)
+        if contents is None:
+            contents = self.base.item(item)
+        return contents
+
+    def mutable_contents(self, item):
+        """Return this session's own, changeable ItemList of items inside container item.
+        Args:
+            item - item key
+        """
+        contents = self.changed_contents.get(item)
+        if contents is None:
+            contents = ItemList(self.base.item(item))
+            self.changed_contents[item] = contents
+        return contents